@@ -1,13 +1,40 @@
-from flask import Flask, render_template, redirect, request,flash,abort,jsonify,url_for,send_file
+from flask import Flask, render_template, redirect, request,flash,abort,jsonify,url_for,send_file,stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import (login_user, login_required, logout_user,current_user)
-from sqlalchemy import func,or_
-import os,io
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+import hmac,mimetypes,os,uuid
+from datetime import datetime
 from extensions import db, login_manager
-from models import User, Food, Cart, Order, OrderItem,Restaurant,OrderStatusHistory,Review
-from decorators import admin_required
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from models import User, Food, Cart, Order, OrderItem,Restaurant,OrderStatusHistory,Review,FoodRating
+from models import DailySales, DailyRestaurantSales, DailyFoodSales
+from decorators import admin_required, super_admin_required, read_only
+from ratings import load_ratings, record_rating, load_review_page, REVIEW_SORTS
+from catalog import (catalog_cache, menu_filters_from_args,
+                     load_menu_catalog, load_all_cuisines, load_menu_page,
+                     load_food_index)
+from search_index import index_food, unindex_food
+from catalog_import import (CatalogImportError, export_rows, export_csv,
+                            parse_rows, plan_import, plan_summary, apply_import,
+                            delete_foods)
+from cart_store import (cart_summaries, LazyCartSummary, EMPTY_CART_SUMMARY,
+                        add_to_cart, remove_from_cart, increment_line,
+                        decrement_line, delete_line, apply_cart_changes)
+from rollups import record_order_sales, record_status_change, SaleLine
+from commands import register_commands
+from order_events import order_status_hub, stream_events, FINAL_STATUSES
+from order_loading import (paginate_orders, load_items_by_order,
+                           load_history_by_order, apply_order_filters)
+from invoices import invoice_store, invoice_snapshot
+from invoice_export import iter_invoice_snapshots, stream_invoice_zip, shared_export_pool
+from recommender import recommender
+from db_config import configure_database, init_engines
+from request_metrics import request_metrics
+from assets import assets
+from compression import compressor
+from conditional import BOOT_NONCE, make_etag, args_digest, not_modified, conditional
+import metrics
 
 # ---------------- APP CONFIG ---------------- #
 
@@ -15,12 +42,51 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'foodapp'
 
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = \
-'sqlite:///' + os.path.join(basedir, 'database.db')
+# DATABASE_URL and pool / pragma settings come from the environment (db_config.py)
+configure_database(app, 'sqlite:///' + os.path.join(basedir, 'database.db'))
+app.config['INVOICE_CACHE_DIR'] = os.path.join(basedir, 'invoice_cache')
 
+ORDERS_PER_PAGE = 10
+ADMIN_ORDERS_PER_PAGE = 20
+CART_BATCH_LIMIT = 100
+CART_DELTA_LIMIT = 99
+
+# First, so its timer wraps every other before_request hook
+request_metrics.init_app(app)
 db.init_app(app)
+init_engines(app)
+with app.app_context():
+    metrics.init_metrics(db.engines)
 login_manager.init_app(app)
 login_manager.login_view = 'login'
+register_commands(app)
+catalog_cache.init_app(app)
+invoice_store.init_app(app)
+recommender.init_app(app)
+assets.init_app(app)
+compressor.init_app(app)
+
+# ---------------- STATIC ASSETS ---------------- #
+
+# Fingerprinted names never change content, so clients may keep them forever
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    found = assets.variant(filename, request.accept_encodings)
+    if found is None:
+        abort(404)
+    path, encoding = found
+
+    # Type of the original file, not of its .br / .gz variant
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0],
+                         max_age=ASSET_MAX_AGE, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 # ---------------- LOGIN ---------------- #
 
@@ -31,13 +97,11 @@ def load_user(user_id):
 # ---------------- CONTEXT ---------------- #
 
 @app.context_processor
-def inject_cart_count():
+def inject_cart_summary():
+    # Lazy: pages that never show the badge never query the cart
     if current_user.is_authenticated:
-        count = db.session.query(func.sum(Cart.quantity)) \
-            .filter(Cart.user_id == current_user.id) \
-            .scalar()
-        return dict(cart_count=count or 0)
-    return dict(cart_count=0)
+        return dict(cart_summary=LazyCartSummary(current_user.id))
+    return dict(cart_summary=EMPTY_CART_SUMMARY)
 
 # ---------------- AUTH ---------------- #
 
@@ -106,129 +170,144 @@ def logout():
 
 @app.route('/menu')
 @login_required
+@read_only
 def menu():
     # ✅ Role check
     if current_user.role not in ["customer", "super_admin"]:
         abort(403)
 
-    query = Food.query
-
-    # 1️⃣ Search text (dish name + cuisine)
-    search = request.args.get('search', '').strip()
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Food.name.ilike(search_term),
-                Food.cuisine.ilike(search_term)
-            )
-        )
-    selected_cuisine = request.args.get('cuisine')
-    if selected_cuisine:
-        query = query.filter(Food.cuisine == selected_cuisine)
-
-    # 2️⃣ Veg / Non-Veg filter
-    food_type = request.args.get('type')
-    if food_type == "veg":
-        query = query.filter(Food.is_veg == True)
-    elif food_type == "nonveg":
-        query = query.filter(Food.is_veg == False)
-
-    # 3️⃣ Price range filter
-    min_price = request.args.get('min_price', type=float)
-    max_price = request.args.get('max_price', type=float)
-    if min_price is not None:
-        query = query.filter(Food.price >= min_price)
-    if max_price is not None:
-        query = query.filter(Food.price <= max_price)
-
-    # 4️⃣ Sort by price
-    sort = request.args.get('sort', '')
-    if sort == 'low':
-        query = query.order_by(Food.price.asc())
-    elif sort == 'high':
-        query = query.order_by(Food.price.desc())
-
-    foods = query.all()
-
-    # ---------------- RESTAURANT GROUPING ----------------
-    restaurants = {}
-    for food in foods:
-        avg_rating = db.session.query(func.avg(Review.rating)) \
-            .filter(Review.food_id == food.id).scalar()
-        food.avg_rating = round(avg_rating, 1) if avg_rating else None
-
-        if food.restaurant:
-            restaurants.setdefault(food.restaurant, []).append(food)
-
     # ---------------- CART MAP ----------------
     cart_items = Cart.query.filter_by(user_id=current_user.id).all()
     cart_map = {item.food_id: item.quantity for item in cart_items}
 
-    # ---------------- CUISINE GROUPING ----------------
-    cuisines = {}
-    for food in foods:
-        cuisines.setdefault(food.cuisine, []).append(food)
+    # ♻️ 304 before any rendering: catalog version + filters, this user's
+    # cart, the newest review (ratings) and their newest order (recommendations)
+    last_order_id, last_review_id = db.session.query(
+        db.session.query(func.max(Order.id))
+        .filter(Order.user_id == current_user.id).scalar_subquery(),
+        db.session.query(func.max(Review.id)).scalar_subquery()
+    ).one()
+    etag = make_etag(
+        "menu", BOOT_NONCE, catalog_cache.current_version(), args_digest(request.args),
+        current_user.id, current_user.role, sorted(cart_map.items()),
+        last_review_id, last_order_id, getattr(recommender.model, "built_at", None)
+    )
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    # 🔍 Search, cuisine, veg and price filters (catalog data is cached)
+    filters = menu_filters_from_args(request.args)
+    catalog = load_menu_catalog(filters)
+    all_cuisines = load_all_cuisines()
 
-    # All cuisines for dropdown
-    all_cuisines = db.session.query(Food.cuisine).distinct().all()
-    all_cuisines = [c[0] for c in all_cuisines]
+    search = request.args.get('search', '').strip()
+    selected_cuisine = request.args.get('cuisine')
 
     # ---------------- Recommendations ----------------
     recommendations = []
     if current_user.role == "customer":
         recommendations = get_user_recommendations(current_user.id)
 
-    return render_template(
+    # ---------------- RATINGS (one query for the whole page) ----------------
+    ratings = load_ratings(
+        [food.id for food in catalog.foods] +
+        [food.id for food in recommendations]
+    )
+
+    return conditional(render_template(
         'menu.html',
-        restaurants=restaurants,
-        cuisines=cuisines,
+        restaurants=catalog.restaurants,
+        cuisines=catalog.cuisines,
         all_cuisines=all_cuisines,
         cart_map=cart_map,
         recommendations=recommendations,
+        ratings=ratings,
         search=search,
         selected_cuisine=selected_cuisine
-    )
+    ), etag)
+
+
+@app.route('/api/menu')
+@login_required
+@read_only
+def api_menu():
+    if current_user.role not in ["customer", "super_admin"]:
+        abort(403)
+
+    # Same filters as /menu, plus ?fields=id,name,price&limit=20&cursor=...
+    filters = menu_filters_from_args(request.args)
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+
+    try:
+        page = load_menu_page(
+            filters,
+            fields=fields,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', 20, type=int)
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    return jsonify({"success": True, **page})
 
 
 @app.route('/food/<int:food_id>')
 @login_required
+@read_only
 def food_details(food_id):
 
     food = Food.query.get_or_404(food_id)
 
-    reviews = Review.query.filter_by(food_id=food.id).all()
-    avg_rating = None
-
-    if reviews:
-        avg_rating = round(sum([r.rating for r in reviews]) / len(reviews), 1)
-
-    return render_template("food_details.html",
-                           food=food,
-                           reviews=reviews,
-                           avg_rating=avg_rating)
+    # ⭐ Average and star histogram come from FoodRating, kept in sync by
+    # add_review, so the page never counts the dish's reviews
+    stats = load_ratings([food.id]).get(food.id)
+    histogram = stats.histogram if stats else dict.fromkeys(range(5, 0, -1), 0)
+    rating_count = stats.rating_count if stats else 0
+
+    sort = request.args.get('sort', 'newest')
+    if sort not in REVIEW_SORTS:
+        sort = 'newest'
+
+    # ♻️ 304 before any rendering: the dish itself, its rating stats (which
+    # change with every new review), the review page asked for and the cart badge
+    etag = make_etag(
+        "food", food.id, food.name, food.price, food.image, food.cuisine,
+        food.is_veg, food.is_bestseller, food.restaurant_id,
+        rating_count, tuple(histogram.values()), args_digest(request.args),
+        current_user.id, current_user.role, tuple(cart_summaries.get(current_user.id))
+    )
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    # 📄 One page of reviews (authors joined in), newest / highest / lowest first
+    try:
+        reviews, next_cursor = load_review_page(
+            food.id, sort=sort, cursor=request.args.get('cursor')
+        )
+    except ValueError:
+        abort(400)
+
+    return conditional(render_template("food_details.html",
+                                       food=food,
+                                       reviews=reviews,
+                                       next_cursor=next_cursor,
+                                       sort=sort,
+                                       sorts=list(REVIEW_SORTS),
+                                       histogram=histogram,
+                                       rating_count=rating_count,
+                                       avg_rating=stats.average if stats else None), etag)
 
 # ---------------- CART ---------------- #
 
 @app.route('/add/<int:id>')
 @login_required
 def add(id):
-    item = Cart.query.filter_by(
-        user_id=current_user.id,
-        food_id=id
-    ).first()
-
-    if item:
-        item.quantity += 1
-    else:
-        item = Cart(
-            user_id=current_user.id,
-            food_id=id,
-            quantity=1
-        )
-        db.session.add(item)
-
+    add_to_cart(current_user.id, id)
     db.session.commit()
+    cart_summaries.invalidate(current_user.id)
+    metrics.CART_ADDS.inc()
     return redirect('/menu')
 
 
@@ -258,30 +337,28 @@ def cart():
 @app.route('/increase/<int:id>')
 @login_required
 def increase(id):
-    item = Cart.query.get(id)
-    item.quantity += 1
+    increment_line(current_user.id, id)
     db.session.commit()
+    cart_summaries.invalidate(current_user.id)
+    metrics.CART_ADDS.inc()
     return redirect('/cart')
 
 
 @app.route('/decrease/<int:id>')
 @login_required
 def decrease(id):
-    item = Cart.query.get(id)
-    if item.quantity > 1:
-        item.quantity -= 1
-    else:
-        db.session.delete(item)
+    decrement_line(current_user.id, id)
     db.session.commit()
+    cart_summaries.invalidate(current_user.id)
     return redirect('/cart')
 
 
 @app.route('/remove/<int:id>')
 @login_required
 def remove(id):
-    item = Cart.query.get(id)
-    db.session.delete(item)
+    delete_line(current_user.id, id)
     db.session.commit()
+    cart_summaries.invalidate(current_user.id)
     return redirect('/cart')
 
 # ---------------- PAYMENT & ORDER ---------------- #
@@ -301,28 +378,41 @@ def payment():
     return render_template(
         'payment.html',
         items=items,
-        total=total
+        total=total,
+        idempotency_key=uuid.uuid4().hex
     )
 
-@app.route('/order')
+@app.route('/order', methods=['POST'])
 @login_required
 def order():
-    cart_items = Cart.query.filter_by(
-        user_id=current_user.id
-    ).all()
+    payment_method = request.form.get('payment_method', 'cod')
+    address = request.form.get('address')
+    phone = request.form.get('phone')
+    idempotency_key = request.form.get('idempotency_key') or None
+
+    # 🔁 Retry or double submit → show the order already placed
+    if idempotency_key:
+        existing = Order.query.filter_by(
+            user_id=current_user.id,
+            idempotency_key=idempotency_key
+        ).first()
+        if existing:
+            return redirect(url_for('order_success', order_id=existing.id))
 
-    if not cart_items:
-        return redirect('/cart')
+    # One joined read of the cart and current prices
+    lines = (
+        db.session.query(
+            Cart.food_id, Cart.quantity, Food.name, Food.price, Food.restaurant_id
+        )
+        .join(Food, Food.id == Cart.food_id)
+        .filter(Cart.user_id == current_user.id)
+        .all()
+    )
 
-    # ✅ ADD THIS LINE HERE
-    payment_method = request.args.get('payment_method', 'cod')
-    address = request.args.get('address')
-    phone = request.args.get('phone')
+    if not lines:
+        return redirect('/cart')
 
-    total = sum(
-        item.food.price * item.quantity
-        for item in cart_items
-    )
+    total = sum(line.price * line.quantity for line in lines)
 
     order = Order(
         user_id=current_user.id,
@@ -330,94 +420,139 @@ def order():
         payment_method=payment_method,
         status='Pending',
         address=address,
-        phone=phone
+        phone=phone,
+        idempotency_key=idempotency_key,
+        created_at=datetime.utcnow()
     )
     db.session.add(order)
-    db.session.commit()
+    db.session.flush()
 
     history = OrderStatusHistory(
         order_id=order.id,
         status='Pending'
     )
     db.session.add(history)
-    db.session.commit() 
 
-    for item in cart_items:
-        db.session.add(OrderItem(
-        order_id=order.id,
-        food_id=item.food.id,
-        food_name=item.food.name,
-        price=item.food.price,
-        quantity=item.quantity
-    ))
+    db.session.execute(OrderItem.__table__.insert(), [
+        {
+            "order_id": order.id,
+            "food_id": line.food_id,
+            "food_name": line.name,
+            "price": line.price,
+            "quantity": line.quantity
+        }
+        for line in lines
+    ])
 
     Cart.query.filter_by(
         user_id=current_user.id
     ).delete()
 
-    db.session.commit()
+    record_order_sales(order, [
+        SaleLine(line.food_id, line.restaurant_id, line.name,
+                 line.price, line.quantity)
+        for line in lines
+    ])
+
+    # ✅ Single commit for order, history, items and cart
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent submit with the same key won the race
+        db.session.rollback()
+        existing = Order.query.filter_by(
+            user_id=current_user.id,
+            idempotency_key=idempotency_key
+        ).first()
+        if idempotency_key is None or existing is None:
+            raise
+        return redirect(url_for('order_success', order_id=existing.id))
+
+    cart_summaries.invalidate(current_user.id)
+    metrics.ORDERS_PLACED.labels(payment_method).inc()
+    metrics.ORDER_VALUE.labels(payment_method).inc(total)
+    recommender.record_order(
+        current_user.id, [line.food_id for line in lines]
+    )
+
+    # 🧾 Pre-render the invoice in the background
+    invoice_store.submit(invoice_snapshot(order, [
+        OrderItem(food_name=line.name, quantity=line.quantity, price=line.price)
+        for line in lines
+    ]))
+
+    return redirect(url_for('order_success', order_id=order.id))
+
+
+@app.route('/order/<int:order_id>/success')
+@login_required
+def order_success(order_id):
+    order = Order.query.get_or_404(order_id)
+
+    if order.user_id != current_user.id:
+        abort(403)
 
     return render_template(
         'order_success.html',
         order=order,
-        payment_method=payment_method
+        payment_method=order.payment_method
     )
 
 @app.route('/orders')
 @login_required
+@read_only
 def orders():
     if current_user.role not in ["customer", "super_admin"]:
         abort(403)
 
-    # 🔹 Step 1: Fetch user’s reviewed food IDs
-    reviewed_food_ids = {
-        r.food_id
-        for r in Review.query.filter_by(user_id=current_user.id).all()
-    }
-
-    review_map = {
-        r.food_id: r.rating
-        for r in Review.query.filter_by(user_id=current_user.id).all()
-    }
+    # 🔹 Step 1: User’s reviews (one query)
+    review_map = dict(
+        db.session.query(Review.food_id, Review.rating)
+        .filter(Review.user_id == current_user.id)
+        .all()
+    )
+    reviewed_food_ids = set(review_map)
 
+    # 🔹 Step 2: One page of orders, newest first
+    orders, next_before = paginate_orders(
+        Order.query.filter_by(user_id=current_user.id),
+        before=request.args.get('before', type=int),
+        per_page=ORDERS_PER_PAGE
+    )
 
-    # 🔹 Step 2: Fetch orders
-    orders = Order.query.filter_by(
-        user_id=current_user.id
-    ).order_by(Order.id.desc()).all()
+    # 🔹 Step 3: Items and status history for the whole page
+    order_ids = [order.id for order in orders]
+    items_by_order = load_items_by_order(order_ids)
+    history_by_order = load_history_by_order(order_ids)
 
     data = []
     for order in orders:
         # Build items with reviewed flag
-        items = []
-
-        for item in OrderItem.query.filter_by(order_id=order.id).all():
-            items.append({
+        items = [
+            {
                 "food_id": item.food_id,
-                "food_name": item.food.name if hasattr(item, "food") else "",
+                "food_name": item.food_name,
                 "quantity": item.quantity,
                 "price": item.price,
                 "reviewed": item.food_id in reviewed_food_ids
-            })
-
-        # Status history
-        history = OrderStatusHistory.query \
-            .filter_by(order_id=order.id) \
-            .order_by(OrderStatusHistory.changed_at.asc()) \
-            .all()
+            }
+            for item in items_by_order[order.id]
+        ]
 
         data.append({
             "order": order,
             "items": items,
-            "history": history
+            "history": history_by_order[order.id]
         })
 
-    # 🔹 Step 3: Pass reviewed_food_ids into template
+    # 🔹 Step 4: Pass reviewed_food_ids into template
     return render_template(
         'orders.html',
         data=data,
         reviewed_food_ids=reviewed_food_ids,
-        review_map=review_map
+        review_map=review_map,
+        next_before=next_before,
+        is_first_page=not request.args.get('before')
     )
 
 
@@ -443,11 +578,17 @@ def admin():
             is_bestseller="is_bestseller" in request.form
         )
         db.session.add(food)
+        db.session.flush()
+        index_food(food)
         db.session.commit()
+        catalog_cache.bump()
 
         flash("Dish added successfully", "success")
         return redirect("/admin")
 
+    return render_admin()
+
+def render_admin(**context):
     if current_user.role == "restaurant_admin":
         foods = Food.query.filter_by(
             restaurant_id=current_user.restaurant_id
@@ -457,52 +598,206 @@ def admin():
         foods = Food.query.all()
         restaurants = Restaurant.query.all()
     
-    return render_template("admin.html", foods=foods, restaurants=restaurants)
+    return render_template("admin.html", foods=foods, restaurants=restaurants, **context)
 
 @app.route('/admin/delete/<int:id>')
 @login_required
 @admin_required
 def delete_food(id):
     food = Food.query.get_or_404(id)
-    db.session.delete(food)
+    cart_user_ids = delete_foods([food.id])
+    unindex_food(food.id)
     db.session.commit()
+    catalog_cache.bump()
+    for user_id in cart_user_ids:
+        cart_summaries.invalidate(user_id)
     return redirect('/admin')
 
+# ---------------- BULK CATALOG IMPORT / EXPORT ---------------- #
+
+def catalog_restaurant_id():
+    """Restaurant admins edit their own menu; super admins name one."""
+    if current_user.restaurant_id is not None:
+        return current_user.restaurant_id
+    if current_user.role == "restaurant_admin":
+        abort(403)
+
+    restaurant_id = request.values.get('restaurant_id', type=int)
+    if restaurant_id is None or db.session.get(Restaurant, restaurant_id) is None:
+        abort(400, description="restaurant_id is required")
+    return restaurant_id
+
+@app.route('/admin/foods/export')
+@login_required
+@admin_required
+@read_only
+def export_foods():
+    restaurant_id = catalog_restaurant_id()
+    rows = export_rows(restaurant_id)
+
+    if request.args.get('format') == 'json':
+        return jsonify({"success": True, "restaurant_id": restaurant_id, "foods": rows})
+
+    return app.response_class(
+        export_csv(rows),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename=foods-{restaurant_id}.csv'}
+    )
+
+@app.route('/admin/foods/import', methods=['POST'])
+@login_required
+@admin_required
+def import_foods():
+    """Create / update / delete dishes from a CSV or JSON file.
+
+    With dry_run only the diff is returned. Otherwise the whole file is
+    applied in one transaction — or not at all if any row is invalid.
+    """
+    restaurant_id = catalog_restaurant_id()
+    wants_json = request.is_json or request.accept_mimetypes.best == 'application/json'
+    payload = request.get_json(silent=True) if request.is_json else None
+    dry_run = request.values.get('dry_run', '').lower() in ('1', 'true', 'on', 'yes')
+    if isinstance(payload, dict) and payload.get('dry_run'):
+        dry_run = True
+
+    try:
+        if request.is_json:
+            rows = parse_rows(payload, "json")
+        else:
+            upload = request.files.get('file')
+            if upload is None or not upload.filename:
+                raise CatalogImportError("Choose a CSV or JSON file")
+            fmt = "json" if upload.filename.lower().endswith(".json") else "csv"
+            rows = parse_rows(upload.read().decode("utf-8-sig"), fmt)
+    except (CatalogImportError, UnicodeDecodeError) as e:
+        if wants_json:
+            return jsonify({"success": False, "message": str(e)}), 400
+        flash(str(e), "error")
+        return redirect("/admin")
+
+    plan = plan_import(rows, restaurant_id)
+    result = {
+        "success": not plan.errors,
+        "dry_run": dry_run,
+        "summary": plan_summary(plan),
+        "diff": {
+            "create": plan.creates,
+            "update": plan.updates,
+            "delete": plan.deletes
+        },
+        "errors": plan.errors
+    }
+
+    if not plan.errors and not dry_run:
+        result["created_ids"], cart_user_ids = apply_import(plan, restaurant_id)
+        db.session.commit()
+        # One invalidation for the whole import
+        catalog_cache.bump()
+        for user_id in cart_user_ids:
+            cart_summaries.invalidate(user_id)
+
+    if wants_json:
+        return jsonify(result), 400 if plan.errors else 200
+
+    if plan.errors or dry_run:
+        return render_admin(import_result=result)
+
+    summary = result["summary"]
+    flash(f"Import applied: {summary['create']} added, {summary['update']} updated, "
+          f"{summary['delete']} deleted", "success")
+    return redirect("/admin")
+
+@app.route('/admin/catalog-cache')
+@login_required
+@admin_required
+def catalog_cache_stats():
+    return jsonify(catalog_cache.stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    if metrics.prometheus_client is None:
+        return "prometheus_client is not installed\n", 501, {'Content-Type': 'text/plain'}
+
+    # With a token only scrapers that send it get in; without one, only
+    # local scrapers and logged-in super admins do. Proxied requests are
+    # never "local", since a reverse proxy on this host connects from localhost
+    token = os.environ.get('METRICS_TOKEN')
+    local = (request.remote_addr in ('127.0.0.1', '::1')
+             and 'X-Forwarded-For' not in request.headers)
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+    elif not local and not (
+        current_user.is_authenticated and current_user.role == 'super_admin'
+    ):
+        abort(403)
+
+    body, content_type = metrics.render_metrics()
+    return body, 200, {'Content-Type': content_type}
+
+@app.route('/admin/perf')
+@login_required
+@super_admin_required
+def admin_perf():
+    endpoints = request_metrics.snapshot()
+    if request.args.get('format') == 'json':
+        return jsonify({
+            "success": True,
+            "since": datetime.utcfromtimestamp(request_metrics.started_at).isoformat() + "Z",
+            "slow_request_ms": request_metrics.slow_ms,
+            "endpoints": endpoints
+        })
+    return render_template(
+        'admin_perf.html',
+        endpoints=endpoints,
+        since=datetime.utcfromtimestamp(request_metrics.started_at),
+        slow_ms=request_metrics.slow_ms
+    )
+
+@app.route('/admin/perf/reset', methods=['POST'])
+@login_required
+@super_admin_required
+def admin_perf_reset():
+    request_metrics.reset()
+    flash("Request metrics reset", "success")
+    return redirect('/admin/perf')
+
 @app.route('/admin/dashboard')
 @login_required
 @admin_required
+@read_only
 def admin_dashboard():
     total_users = User.query.count()
 
-    # Role-based logic for orders and revenue
+    # Orders, revenue and top foods come from the daily rollups only
     if current_user.role == "restaurant_admin":
-        total_orders = (
-            db.session.query(Order)
-            .join(OrderItem)
-            .join(Food)
-            .filter(Food.restaurant_id == current_user.restaurant_id)
-            .distinct()
-            .count()
+        total_orders, total_revenue = (
+            db.session.query(
+                func.sum(DailyRestaurantSales.order_count),
+                func.sum(DailyRestaurantSales.revenue)
+            )
+            .filter(DailyRestaurantSales.restaurant_id == current_user.restaurant_id)
+            .one()
         )
-
-        total_revenue = (
-            db.session.query(func.sum(OrderItem.price * OrderItem.quantity))
-            .join(Food)
-            .filter(Food.restaurant_id == current_user.restaurant_id)
-            .scalar()
-        ) or 0
     else:
-        total_orders = Order.query.count()
-        total_revenue = db.session.query(func.sum(Order.total)).scalar() or 0
-
-    # Top foods (you may also want to filter by restaurant if admin is restaurant-specific)
-    top_foods = (
-        db.session.query(
-            OrderItem.food_name,
-            func.sum(OrderItem.quantity).label('qty')
+        total_orders, total_revenue = db.session.query(
+            func.sum(DailySales.order_count),
+            func.sum(DailySales.revenue)
+        ).one()
+
+    top_foods_query = db.session.query(
+        func.max(DailyFoodSales.food_name).label('food_name'),
+        func.sum(DailyFoodSales.quantity).label('total_qty')
+    )
+    if current_user.role == "restaurant_admin":
+        top_foods_query = top_foods_query.filter(
+            DailyFoodSales.restaurant_id == current_user.restaurant_id
         )
-        .group_by(OrderItem.food_name)
-        .order_by(func.sum(OrderItem.quantity).desc())
+    top_foods = (
+        top_foods_query
+        .group_by(DailyFoodSales.food_id)
+        .having(func.sum(DailyFoodSales.quantity) > 0)
+        .order_by(func.sum(DailyFoodSales.quantity).desc())
         .limit(5)
         .all()
     )
@@ -518,41 +813,100 @@ def admin_dashboard():
     return render_template(
         'dashboard.html',
         total_users=total_users,
-        total_orders=total_orders,
-        total_revenue=total_revenue,
+        total_orders=total_orders or 0,
+        total_revenue=round(total_revenue or 0, 2),
         top_foods=top_foods,
         recent_orders=recent_orders
     )
 
 
+def admin_restaurant_scope():
+    """Restaurant an admin's order views are limited to (None = all).
+
+    A restaurant admin without a restaurant gets a 403, never every order.
+    """
+    if current_user.role != "restaurant_admin":
+        return None
+    if current_user.restaurant_id is None:
+        abort(403)
+    return current_user.restaurant_id
+
+
 @app.route('/admin/orders')
 @login_required
 @admin_required
+@read_only
 def admin_orders():
+    parse_date = lambda value: datetime.strptime(value, '%Y-%m-%d')
 
-    if current_user.role == "restaurant_admin":
-        orders = (
-            db.session.query(Order)
-            .join(OrderItem)
-            .join(Food)
-            .filter(Food.restaurant_id == current_user.restaurant_id)
-            .distinct()
-            .order_by(Order.id.desc())
-            .all()
-        )
-    else:
-        orders = Order.query.order_by(Order.id.desc()).all()
+    filters = {
+        'status': request.args.get('status', ''),
+        'payment_method': request.args.get('payment_method', ''),
+        'date_from': request.args.get('date_from', ''),
+        'date_to': request.args.get('date_to', '')
+    }
+
+    query = apply_order_filters(
+        Order.query.options(joinedload(Order.user)),
+        status=filters['status'],
+        payment_method=filters['payment_method'],
+        date_from=request.args.get('date_from', type=parse_date),
+        date_to=request.args.get('date_to', type=parse_date),
+        restaurant_id=admin_restaurant_scope()
+    )
+
+    orders, next_before = paginate_orders(
+        query,
+        before=request.args.get('before', type=int),
+        per_page=ADMIN_ORDERS_PER_PAGE
+    )
+
+    # One batched fetch of items for the page; users came with the orders
+    items_by_order = load_items_by_order([order.id for order in orders])
 
     data = []
     for order in orders:
-        items = OrderItem.query.filter_by(order_id=order.id).all()
         data.append({
             'order': order,
-            'items': items,
+            'items': items_by_order[order.id],
             'user': order.user
         })
 
-    return render_template('admin_orders.html', data=data)
+    return render_template(
+        'admin_orders.html',
+        data=data,
+        filters=filters,
+        filter_args={k: v for k, v in filters.items() if v},
+        next_before=next_before,
+        is_first_page=not request.args.get('before')
+    )
+
+@app.route('/admin/invoices/export')
+@login_required
+@admin_required
+def export_invoices():
+    parse_date = lambda value: datetime.strptime(value, '%Y-%m-%d')
+
+    # Restaurant admins can only export their own restaurant
+    restaurant_id = admin_restaurant_scope()
+    if current_user.role != "restaurant_admin":
+        restaurant_id = request.args.get('restaurant_id', type=int)
+
+    snapshots = iter_invoice_snapshots(
+        date_from=request.args.get('date_from', type=parse_date),
+        date_to=request.args.get('date_to', type=parse_date),
+        restaurant_id=restaurant_id
+    )
+
+    filename = "FoodHub_Invoices_{}_{}.zip".format(
+        request.args.get('date_from', 'start'),
+        request.args.get('date_to', 'today')
+    )
+    return app.response_class(
+        stream_with_context(stream_invoice_zip(snapshots, pool=shared_export_pool())),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 @app.route('/admin/update-order-status/<int:order_id>', methods=['POST'])
 @login_required
@@ -561,6 +915,8 @@ def update_order_status(order_id):
     order = Order.query.get(order_id)
     if order:
         new_status = request.form.get('status')
+        cancelled = new_status == 'Cancelled' and order.status != 'Cancelled'
+        record_status_change(order, order.status, new_status)
         order.status = new_status
         history = OrderStatusHistory(
             order_id=order.id,
@@ -568,6 +924,9 @@ def update_order_status(order_id):
         )
         db.session.add(history)
         db.session.commit()
+        order_status_hub.publish(order.user_id, order.id, order.status)
+        if cancelled:
+            metrics.ORDERS_CANCELLED.labels("admin").inc()
     flash("Order status updated", "success")
     return redirect('/admin/orders')
 
@@ -577,6 +936,8 @@ def update_order_status(order_id):
 def cancel_order(order_id):
     order = Order.query.get(order_id)
     if order:
+        cancelled = order.status != 'Cancelled'
+        record_status_change(order, order.status, 'Cancelled')
         order.status = 'Cancelled'
         history = OrderStatusHistory(
             order_id=order.id,
@@ -584,12 +945,16 @@ def cancel_order(order_id):
         )
         db.session.add(history)
         db.session.commit()
+        order_status_hub.publish(order.user_id, order.id, order.status)
+        if cancelled:
+            metrics.ORDERS_CANCELLED.labels("admin").inc()
     flash("Order cancelled", "success")
     return redirect('/admin/orders')
 
 
 @app.route('/profile')
 @login_required
+@read_only
 def profile():
     total_orders = Order.query.filter_by(
         user_id=current_user.id
@@ -636,6 +1001,10 @@ def change_password():
 @app.route('/payment/online', methods=['GET', 'POST'])
 @login_required
 def online_payment():
+    # Demo payment success: hand the same form (and key) over to checkout
+    if request.method == 'POST':
+        return redirect(url_for('order'), code=307)
+
     items = Cart.query.filter_by(
         user_id=current_user.id
     ).all()
@@ -648,13 +1017,10 @@ def online_payment():
         for item in items
     )
 
-    # Demo payment success
-    if request.method == 'POST':
-        return redirect('/order?payment_method=online')
-
     return render_template(
         'online_payment.html',
-        total=total
+        total=total,
+        idempotency_key=uuid.uuid4().hex
     )
 
 @app.route('/review/<int:food_id>', methods=['POST'])
@@ -684,14 +1050,20 @@ def add_review(food_id):
         flash("You already reviewed this item.","info")
         return redirect('/orders')
 
+    rating = request.form.get('rating', type=int)
+    if rating not in range(1, 6):
+        flash("Rating must be between 1 and 5.", "error")
+        return redirect('/orders')
+
     review = Review(
         user_id=current_user.id,
         food_id=food_id,
-        rating=int(request.form['rating']),
+        rating=rating,
         comment=request.form['comment']
     )
 
     db.session.add(review)
+    record_rating(food_id, rating)
     db.session.commit()
 
     flash("✅ Review submitted successfully!")
@@ -701,59 +1073,173 @@ def add_review(food_id):
 @app.route('/api/cart/add/<int:food_id>', methods=['POST'])
 @login_required
 def api_add_to_cart(food_id):
-    item = Cart.query.filter_by(
-        user_id=current_user.id,
-        food_id=food_id
-    ).first()
-
-    if item:
-        item.quantity += 1
-    else:
-        item = Cart(
-            user_id=current_user.id,
-            food_id=food_id,
-            quantity=1
-        )
-        db.session.add(item)
-
+    quantity = add_to_cart(current_user.id, food_id)
     db.session.commit()
+    metrics.CART_ADDS.inc()
 
     return jsonify({
         "success": True,
-        "quantity": item.quantity
+        "quantity": quantity,
+        "cart": cart_summaries.refresh(current_user.id)._asdict()
     })
 
 # ➖ Decrease quantity (AJAX)
 @app.route('/api/cart/remove/<int:food_id>', methods=['POST'])
 @login_required
 def api_remove_from_cart(food_id):
-    item = Cart.query.filter_by(
-        user_id=current_user.id,
-        food_id=food_id
-    ).first()
+    quantity = remove_from_cart(current_user.id, food_id)
+    db.session.commit()
+
+    return jsonify({
+        "success": True,
+        "quantity": quantity,
+        "cart": cart_summaries.refresh(current_user.id)._asdict()
+    })
 
-    if not item:
-        return jsonify({"success": True, "quantity": 0})
+# 📦 Many quantity changes in one transaction (debounced menu clicks)
+@app.route('/api/cart/batch', methods=['POST'])
+@login_required
+def api_cart_batch():
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = {}
+    batch = payload.get('changes', []) if isinstance(payload, dict) else None
+    if not isinstance(batch, list):
+        return jsonify({
+            "success": False,
+            "error": 'Body must be {"changes": [{"food_id": ..., "delta": ...}, ...]}'
+        }), 400
+
+    changes = {}
+    try:
+        for change in batch[:CART_BATCH_LIMIT]:
+            food_id = int(change['food_id'])
+            changes[food_id] = changes.get(food_id, 0) + int(change['delta'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({
+            "success": False,
+            "error": "Each change needs an integer food_id and delta"
+        }), 400
+
+    if any(abs(delta) > CART_DELTA_LIMIT for delta in changes.values()):
+        return jsonify({
+            "success": False,
+            "error": f"delta must be between -{CART_DELTA_LIMIT} and {CART_DELTA_LIMIT}"
+        }), 400
+
+    try:
+        quantities = apply_cart_changes(current_user.id, changes)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 400
 
-    if item.quantity > 1:
-        item.quantity -= 1
-        db.session.commit()
-        return jsonify({"success": True, "quantity": item.quantity})
-    else:
-        db.session.delete(item)
-        db.session.commit()
-        return jsonify({"success": True, "quantity": 0})
+    db.session.commit()
+    metrics.CART_ADDS.inc(sum(delta for delta in changes.values() if delta > 0))
+
+    return jsonify({
+        "success": True,
+        "quantities": {str(k): v for k, v in quantities.items()},
+        "cart": cart_summaries.refresh(current_user.id)._asdict()
+    })
 
 @app.route('/api/order-status/<int:order_id>')
 @login_required
 def api_order_status(order_id):
-    order=Order.query.get(order_id)
-    if not order or order.user_id!=current_user.id:
+    # ♻️ The newest status-history row identifies the current status
+    latest = (
+        db.session.query(
+            Order.user_id,
+            func.max(OrderStatusHistory.id),
+            func.max(OrderStatusHistory.changed_at)
+        )
+        .outerjoin(OrderStatusHistory, OrderStatusHistory.order_id == Order.id)
+        .filter(Order.id == order_id)
+        .group_by(Order.id)
+        .first()
+    )
+    if not latest or latest.user_id != current_user.id:
         return jsonify({"success":False})
-    return jsonify({
+
+    _, last_change_id, last_changed_at = latest
+    etag = make_etag("order-status", order_id, last_change_id)
+    cached = not_modified(etag, last_changed_at)
+    if cached:
+        return cached
+
+    order=Order.query.get(order_id)
+    return conditional(jsonify({
         "success":True,
         "status":order.status
-    })
+    }), etag, last_changed_at)
+
+# 🔁 Polling fallback: statuses for a batch of the user's orders in one query
+@app.route('/api/order-status')
+@login_required
+def api_order_statuses():
+    ids = [int(i) for i in request.args.get('ids', '').split(',') if i.isdigit()][:100]
+    if not ids:
+        return jsonify({"success": True, "statuses": {}})
+
+    # ♻️ Same validator as a single order, over the whole batch
+    last_change_id, last_changed_at = (
+        db.session.query(
+            func.max(OrderStatusHistory.id),
+            func.max(OrderStatusHistory.changed_at)
+        )
+        .join(Order, Order.id == OrderStatusHistory.order_id)
+        .filter(Order.id.in_(ids), Order.user_id == current_user.id)
+        .one()
+    )
+    etag = make_etag("order-statuses", current_user.id, sorted(ids), last_change_id)
+    cached = not_modified(etag, last_changed_at)
+    if cached:
+        return cached
+
+    rows = (
+        db.session.query(Order.id, Order.status)
+        .filter(Order.id.in_(ids), Order.user_id == current_user.id)
+        .all()
+    )
+    return conditional(jsonify({
+        "success": True,
+        "statuses": {str(order_id): status for order_id, status in rows}
+    }), etag, last_changed_at)
+
+# 📡 Live status changes for the user's orders (SSE)
+@app.route('/api/order-status/stream')
+@login_required
+def api_order_status_stream():
+    user_id = current_user.id
+    # The orders the page shows (?ids=), whatever their status, so a reconnect
+    # still reports an order that was delivered or cancelled in the meantime
+    ids = [int(i) for i in request.args.get('ids', '').split(',') if i.isdigit()][:100]
+
+    def load_statuses():
+        query = db.session.query(Order.id, Order.status).filter(Order.user_id == user_id)
+        if ids:
+            query = query.filter(Order.id.in_(ids))
+        else:
+            query = query.filter(Order.status.notin_(FINAL_STATUSES))
+        rows = query.all()
+        # End the read transaction: don't pin a connection (or an old
+        # snapshot) for the life of the stream
+        db.session.rollback()
+        return rows
+
+    # Subscribe before reading the snapshot so no change slips in between
+    events = order_status_hub.subscribe(user_id)
+    snapshot = load_statuses()
+
+    response = app.response_class(
+        stream_with_context(stream_events(events, snapshot, refresh=load_statuses)),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(
+        lambda: order_status_hub.unsubscribe(user_id, events)
+    )
+    return response
 
 @app.route('/cancel-order/<int:order_id>', methods=['POST'])
 @login_required
@@ -768,10 +1254,12 @@ def user_cancel_order(order_id):
         flash("Order cannot be cancelled now.", "danger")
         return redirect('/orders')
 
+    record_status_change(order, order.status, 'Cancelled')
     order.status = 'Cancelled'
 
     # ✅ REFUND LOGIC (THIS WAS MISSING)
-    if order.payment_method.lower() == "online":
+    refunded = order.payment_method.lower() == "online"
+    if refunded:
         order.payment_status = "Refunded"
         order.refund_status = "Refund Initiated (Mock)"
 
@@ -781,6 +1269,12 @@ def user_cancel_order(order_id):
     )
     db.session.add(history)
     db.session.commit()
+    order_status_hub.publish(order.user_id, order.id, order.status)
+
+    metrics.ORDERS_CANCELLED.labels("customer").inc()
+    if refunded:
+        metrics.REFUNDS.inc()
+        metrics.REFUND_VALUE.inc(order.total)
 
     flash("Order cancelled successfully.", "success")
     return redirect('/orders')
@@ -850,6 +1344,16 @@ def create_restaurant_admin():
     return "Restaurant admin created"
 
 def get_user_recommendations(user_id, limit=3):
+    # Precomputed item-to-item model; SQL until it is ready (or without NumPy)
+    food_ids = recommender.recommend(user_id, limit)
+    if food_ids is None:
+        return get_user_recommendations_sql(user_id, limit)
+
+    foods = load_food_index()
+    return [foods[food_id] for food_id in food_ids if food_id in foods]
+
+
+def get_user_recommendations_sql(user_id, limit=3):
     # 1️⃣ Foods ordered by user
     ordered_food_ids = (
         db.session.query(OrderItem.food_id)
@@ -872,13 +1376,19 @@ def get_user_recommendations(user_id, limit=3):
 
         cuisines = [c[0] for c in cuisines]
 
-        # 3️⃣ Recommend similar cuisine foods
+        # 3️⃣ Recommend similar cuisine foods, best rated first
         recommendations = (
             Food.query
+            .outerjoin(FoodRating, FoodRating.food_id == Food.id)
             .filter(
                 Food.cuisine.in_(cuisines),
                 Food.id.notin_(ordered_food_ids)
             )
+            .order_by(
+                (FoodRating.rating_sum * 1.0 / FoodRating.rating_count)
+                .desc()
+                .nulls_last()
+            )
             .limit(limit)
             .all()
         )
@@ -913,85 +1423,23 @@ def generate_invoice(order_id):
     order = Order.query.get_or_404(order_id)
 
     # Security: customer can download only their own invoice
-    if order.user_id != current_user.id and current_user.role == "Customer":
+    if order.user_id != current_user.id and current_user.role == "customer":
         abort(403)
 
     # ✅ FIX: fetch items manually
     order_items = OrderItem.query.filter_by(order_id=order.id).all()
 
-    buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    y = height - 50
-
-    # Title
-    pdf.setFont("Helvetica-Bold", 18)
-    pdf.drawString(180, y, "FoodHub Invoice")
-    y -= 40
-
-    # Order info
-    pdf.setFont("Helvetica", 12)
-    pdf.drawString(50, y, f"Order ID: {order.id}")
-    y -= 20
-    pdf.drawString(50, y, f"Payment Method: {order.payment_method.upper()}")
-    y -= 20
-    pdf.drawString(50, y, f"Delivery Address: {order.address}")
-    y -= 30
-
-    # Table header
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(50, y, "Item")
-    pdf.drawString(260, y, "Qty")
-    pdf.drawString(310, y, "Price")
-    pdf.drawString(390, y, "Total")
-    y -= 20
-
-    pdf.setFont("Helvetica", 11)
-
-    subtotal = 0
-
-    for item in order_items:
-        item_total = item.price * item.quantity
-        subtotal += item_total
-
-        pdf.drawString(50, y, item.food_name)
-        pdf.drawString(260, y, str(item.quantity))
-        pdf.drawString(310, y, f"₹{item.price}")
-        pdf.drawString(390, y, f"₹{item_total}")
-        y -= 20
-
-        if y < 100:
-            pdf.showPage()
-            y = height - 50
-
-    # Charges
-    gst = round(subtotal * 0.05, 2)
-    delivery_charge = 40 if subtotal < 500 else 0
-    final_amount = subtotal + gst + delivery_charge
-
-    y -= 20
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(300, y, "Subtotal:")
-    pdf.drawString(390, y, f"₹{subtotal}")
-    y -= 20
-    pdf.drawString(300, y, "GST (5%):")
-    pdf.drawString(390, y, f"₹{gst}")
-    y -= 20
-    pdf.drawString(300, y, "Delivery:")
-    pdf.drawString(390, y, f"₹{delivery_charge}")
-    y -= 20
-    pdf.drawString(300, y, "Final Amount:")
-    pdf.drawString(390, y, f"₹{final_amount}")
-
-    pdf.showPage()
-    pdf.save()
-    buffer.seek(0)
+    # Rendered once per content version, then served from disk
+    path, digest = invoice_store.ensure(invoice_snapshot(order, order_items))
 
     return send_file(
-        buffer,
+        path,
         as_attachment=True,
         download_name=f"FoodHub_Invoice_Order_{order.id}.pdf",
-        mimetype="application/pdf"
+        mimetype="application/pdf",
+        conditional=True,
+        etag=digest,
+        max_age=0
     )
 
 
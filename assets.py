@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from flask import request, url_for
+from flask.sessions import SecureCookieSessionInterface
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz variants are built
+    brotli = None
+
+# Static asset pipeline.
+#
+# ``flask build-assets`` minifies every .css/.js file under static/, writes
+# ``<name>.<hash>.<ext>`` copies (plus .gz/.br variants) to static/dist and
+# records them in static/dist/manifest.json. Templates call
+# ``asset_url("style.css")``, which returns the fingerprinted /assets/ URL
+# once a build exists and the plain /static/ URL until then.
+
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+EXTENSIONS = (".css", ".js")
+
+# Variants smaller than this are not worth a second request path
+MIN_COMPRESS_SIZE = 256
+
+# ---------------- MINIFY ---------------- #
+
+def minify_css(source):
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.S)
+    source = re.sub(r"\s+", " ", source)
+    # Spaces before ":" are kept: "a :hover" is not "a:hover"
+    source = re.sub(r"\s*([{};,>])\s*", r"\1", source)
+    source = re.sub(r":\s+", ":", source)
+    source = source.replace(";}", "}")
+    return source.strip()
+
+
+def minify_js(source):
+    """Conservative: drop blank lines, indentation and whole-line comments.
+
+    Line breaks are kept, so automatic semicolon insertion is unaffected.
+    """
+    lines = []
+    for line in source.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+# ---------------- BUILD ---------------- #
+
+def _write(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _source_files(static_dir):
+    dist = os.path.join(static_dir, DIST_DIR)
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root).startswith(os.path.abspath(dist)):
+            continue
+        for name in sorted(files):
+            if name.endswith(EXTENSIONS):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_dir).replace(os.sep, "/"), path
+
+
+def build_assets(static_dir, echo=print):
+    """Minify, fingerprint and precompress; returns the new manifest."""
+    dist = os.path.join(static_dir, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+    os.makedirs(dist)
+
+    manifest = {}
+    for name, path in _source_files(static_dir):
+        base, ext = os.path.splitext(name)
+        with open(path, encoding="utf-8") as f:
+            data = MINIFIERS[ext](f.read()).encode("utf-8")
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed = f"{base}.{digest}{ext}"
+        target = os.path.join(dist, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        _write(target, data)
+
+        sizes = [f"{os.path.getsize(path):,} → {len(data):,} B"]
+        if len(data) >= MIN_COMPRESS_SIZE:
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            _write(target + ".gz", gz)
+            sizes.append(f"gz {len(gz):,} B")
+            if brotli is not None:
+                br = brotli.compress(data, quality=11)
+                _write(target + ".br", br)
+                sizes.append(f"br {len(br):,} B")
+
+        manifest[name] = hashed
+        echo(f"  {name:<24} {hashed:<32} {', '.join(sizes)}")
+
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+# ---------------- SERVING ---------------- #
+
+class AssetSessionInterface(SecureCookieSessionInterface):
+    """Never touches the session cookie on asset responses.
+
+    Flask-Login reads the session after every request, which would add
+    "Vary: Cookie" and tie cached CSS/JS to the visitor's cookie.
+    """
+
+    def save_session(self, app, session, response):
+        if request.endpoint in ("asset", "static"):
+            return
+        super().save_session(app, session, response)
+
+
+class AssetManifest:
+    """Maps source names to fingerprinted files in static/dist."""
+
+    def __init__(self):
+        self.directory = None
+        self.files = {}
+        self.hashed = set()
+
+    def init_app(self, app):
+        self.directory = os.path.join(app.static_folder, DIST_DIR)
+        self.load()
+        app.jinja_env.globals["asset_url"] = self.url
+        app.session_interface = AssetSessionInterface()
+
+    def load(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST)) as f:
+                self.files = json.load(f)
+        except (OSError, ValueError):
+            self.files = {}
+        self.hashed = set(self.files.values())
+
+    def url(self, filename):
+        """``url_for('static', filename=...)``, fingerprinted when built."""
+        hashed = self.files.get(filename)
+        if hashed is None:
+            return url_for("static", filename=filename)
+        return url_for("asset", filename=hashed)
+
+    def variant(self, filename, accept_encodings):
+        """``(path, content_encoding)`` of the best file for the client.
+
+        Returns None for names that are not in the manifest.
+        """
+        if filename not in self.hashed:
+            return None
+
+        path = os.path.join(self.directory, filename)
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if accept_encodings[encoding] and os.path.exists(path + suffix):
+                return path + suffix, encoding
+        return path, None
+
+
+assets = AssetManifest()
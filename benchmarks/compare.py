@@ -0,0 +1,49 @@
+"""Diff two benchmarks.load reports route by route.
+
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+import argparse
+import json
+
+
+def _delta(old, new):
+    if old is None or new is None:
+        return "-"
+    if not old:
+        return f"{new:+}"
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        old = json.load(f)
+    with open(args.candidate) as f:
+        new = json.load(f)
+
+    print(f"baseline  {old['meta'].get('git_revision')}  {old['meta']['started_at']}")
+    print(f"candidate {new['meta'].get('git_revision')}  {new['meta']['started_at']}\n")
+    print(f"{'route':<34} {'p50':>16} {'p95':>16} {'p99':>16} {'rps':>14} {'queries':>12}")
+
+    for route in sorted(set(old["routes"]) | set(new["routes"])):
+        a, b = old["routes"].get(route), new["routes"].get(route)
+        if a is None or b is None:
+            print(f"{route:<34} {'only in ' + ('candidate' if a is None else 'baseline'):>16}")
+            continue
+
+        cells = []
+        for p in ("p50", "p95", "p99"):
+            x, y = a["latency_ms"][p], b["latency_ms"][p]
+            cells.append(f"{y:>8} {_delta(x, y):>7}")
+        cells.append(f"{b['throughput_rps']:>6} {_delta(a['throughput_rps'], b['throughput_rps']):>7}")
+        cells.append(f"{b['queries']['mean']} {_delta(a['queries']['mean'], b['queries']['mean']):>6}")
+        print(f"{route:<34} " + " ".join(f"{c:>16}" for c in cells[:3])
+              + f" {cells[3]:>14} {cells[4]:>12}")
+
+
+if __name__ == "__main__":
+    main()
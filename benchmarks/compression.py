@@ -0,0 +1,119 @@
+"""Response compression: bytes on the wire and CPU cost per route.
+
+Seeds a throwaway SQLite database (benchmarks.seed, small scale), fetches
+each route as a logged-in customer or admin with ``Accept-Encoding``
+identity, gzip and br, and times the compressor alone on each body.
+
+    python -m benchmarks.compression --foods 3000
+"""
+import argparse
+import os
+import tempfile
+import time
+from argparse import Namespace
+
+
+ROUTES = [
+    ("customer", "/menu"),
+    ("customer", "/menu?search=paneer"),
+    ("customer", "/menu?cuisine=Chinese&sort=low"),
+    ("customer", "/food/1"),
+    ("customer", "/api/menu?limit=100"),
+    ("customer", "/orders"),
+    ("customer", "/api/order-status?ids={order_ids}"),
+    ("admin", "/admin/orders"),
+]
+
+
+def cpu_per_call(fn, body, min_time=0.2):
+    """Mean CPU seconds of ``fn(body)``, repeated for at least ``min_time``."""
+    calls = 0
+    start = time.process_time()
+    while True:
+        fn(body)
+        calls += 1
+        elapsed = time.process_time() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--restaurants", type=int, default=60)
+    parser.add_argument("--foods", type=int, default=3000)
+    parser.add_argument("--orders", type=int, default=5000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tmp, "bench.db")
+
+    from app import app
+    from compression import BrotliEncoder, GzipEncoder, brotli, compressor
+    from migrations import run_migrations
+    from models import Order, User
+    from benchmarks.seed import PASSWORD, seed
+
+    with app.app_context():
+        run_migrations(echo=lambda line: None)
+        print(f"Seeding {args.foods} dishes, {args.orders} orders ...")
+        seed(Namespace(
+            restaurants=args.restaurants, foods=args.foods, users=200,
+            orders=args.orders, reviews=2000, days=30, batch_size=5000, seed=42
+        ))
+        customer = User.query.filter(User.username.like("bench_user_%")).first()
+        order_ids = [order_id for (order_id,) in
+                     Order.query.with_entities(Order.id)
+                     .filter_by(user_id=customer.id).limit(20)]
+        usernames = {"customer": customer.username, "admin": "bench_admin"}
+
+    clients = {}
+    for role, username in usernames.items():
+        clients[role] = app.test_client()
+        clients[role].post("/login", data={"username": username, "password": PASSWORD})
+
+    encoders = {"gzip": lambda: GzipEncoder(compressor.gzip_level)}
+    if brotli is not None:
+        encoders["br"] = lambda: BrotliEncoder(compressor.brotli_quality)
+
+    def compress_with(make):
+        def run(body):
+            encoder = make()
+            return encoder.compress(body) + encoder.finish()
+        return run
+
+    print(f"\ngzip level {compressor.gzip_level}"
+          + (f", brotli quality {compressor.brotli_quality}" if brotli else ", brotli not installed")
+          + f", min size {compressor.min_size} B\n")
+    header = f"{'route':<38} {'identity':>10}"
+    for name in encoders:
+        header += f" {name + ' bytes':>11} {'ratio':>6} {'CPU µs':>8}"
+    print(header)
+
+    totals = {"identity": 0, **{name: 0 for name in encoders}}
+    for role, path in ROUTES:
+        path = path.format(order_ids=",".join(map(str, order_ids)))
+        client = clients[role]
+        # Warm caches so the first fetch isn't special
+        client.get(path, headers={"Accept-Encoding": "identity"})
+
+        body = client.get(path, headers={"Accept-Encoding": "identity"}).get_data()
+        totals["identity"] += len(body)
+        row = f"{path[:38]:<38} {len(body):>10,}"
+
+        for name, make in encoders.items():
+            response = client.get(path, headers={"Accept-Encoding": name})
+            wire = len(response.get_data())
+            totals[name] += wire
+            compressed = response.headers.get("Content-Encoding") == name
+            cpu = cpu_per_call(compress_with(make), body) * 1e6 if compressed else 0
+            row += (f" {wire:>11,} {len(body) / wire if wire else 0:>5.1f}x"
+                    f" {cpu:>8.0f}" if compressed else f" {wire:>11,} {'-':>6} {'-':>8}")
+        print(row)
+
+    print(f"\n{'total':<38} {totals['identity']:>10,}"
+          + "".join(f" {totals[name]:>11,} {totals['identity'] / totals[name]:>5.1f}x {'':>8}"
+                    for name in encoders))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""Concurrent load test against a seeded database (see benchmarks.seed).
+
+Virtual users log in and loop over weighted scenarios — browsing /menu with
+filters, AJAX cart adds, checkout, /orders, invoice downloads, and the admin
+order console and dashboard as both a super admin and restaurant admins — through the Flask test client or a real threaded WSGI
+server. Per route it reports p50/p95/p99 latency, throughput and the SQL
+queries each request ran, as JSON that can be diffed between releases
+(python -m benchmarks.compare old.json new.json).
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.load --users 8 --duration 30 -o run.json
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from flask import g, has_request_context, request, request_finished
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.serving import make_server
+from benchmarks.seed import CUISINES, DISHES, PASSWORD
+
+# ---------------- SQL QUERY COUNTS ---------------- #
+
+class QueryCounter:
+    """Counts SQL statements per request, keyed like the client samples."""
+
+    def __init__(self, app):
+        self.counts = defaultdict(list)
+        self._lock = threading.Lock()
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        request_finished.connect(self._on_finished, app)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g._bench_queries = g.get("_bench_queries", 0) + 1
+
+    def _on_finished(self, sender, response, **extra):
+        if request.url_rule is None:
+            return
+        key = f"{request.method} {request.url_rule.rule}"
+        with self._lock:
+            self.counts[key].append(g.get("_bench_queries", 0))
+
+# ---------------- CLIENTS ---------------- #
+
+class TestClientSession:
+    """One virtual user's cookie session on the in-process test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, json_body=None):
+        response = self.client.open(path, method=method, data=data, json=json_body)
+        body = response.get_data()
+        return response.status_code, response.headers.get("Location"), body
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """One virtual user's cookie session against a real HTTP server."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect()
+        )
+
+    def request(self, method, path, data=None, json_body=None):
+        headers = {}
+        payload = None
+        if json_body is not None:
+            payload = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+        elif data is not None:
+            payload = urllib.parse.urlencode(data).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        req = urllib.request.Request(
+            self.base_url + path, data=payload, headers=headers, method=method
+        )
+        try:
+            with self.opener.open(req) as response:
+                return response.status, response.headers.get("Location"), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get("Location"), e.read()
+
+# ---------------- SCENARIOS ---------------- #
+
+class VirtualUser:
+
+    def __init__(self, session, recorder, rng, username, food_ids, order_ids):
+        self.session = session
+        self.recorder = recorder
+        self.rng = rng
+        self.username = username
+        self.food_ids = food_ids
+        self.order_ids = order_ids
+
+    def call(self, route, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            status, location, _ = self.session.request(method, path, **kwargs)
+        except Exception:
+            status, location = 599, None
+        self.recorder.record(f"{method} {route}", time.perf_counter() - start, status)
+        return status, location
+
+    def login(self):
+        status, _ = self.call("/login", "POST", "/login", data={
+            "username": self.username, "password": PASSWORD
+        })
+        if status != 302:
+            raise RuntimeError(f"login failed for {self.username} ({status})")
+
+    # Customer scenarios
+
+    def browse_menu(self):
+        params = {}
+        if self.rng.random() < 0.5:
+            params["search"] = self.rng.choice(DISHES).split()[0].lower()
+        if self.rng.random() < 0.4:
+            params["cuisine"] = self.rng.choice(CUISINES)
+        if self.rng.random() < 0.3:
+            params["sort"] = self.rng.choice(["low", "high"])
+        query = urllib.parse.urlencode(params)
+        self.call("/menu", "GET", "/menu" + (f"?{query}" if query else ""))
+
+    def cart_add(self):
+        self.call("/api/cart/batch", "POST", "/api/cart/batch", json_body={
+            "changes": [{"food_id": self.rng.choice(self.food_ids), "delta": 1}]
+        })
+
+    def checkout(self):
+        self.cart_add()
+        _, location = self.call("/order", "POST", "/order", data={
+            "payment_method": "cod",
+            "address": "1 Bench Street",
+            "phone": "9000000000",
+            "idempotency_key": uuid.uuid4().hex
+        })
+        # /order/<id>/success
+        if location and "/order/" in location:
+            self.order_ids.append(int(location.rstrip("/").split("/")[-2]))
+
+    def my_orders(self):
+        self.call("/orders", "GET", "/orders")
+
+    def invoice(self):
+        if not self.order_ids:
+            return self.my_orders()
+        order_id = self.rng.choice(self.order_ids)
+        self.call("/invoice/<int:order_id>", "GET", f"/invoice/{order_id}")
+
+    # Admin scenario
+
+    def admin_orders(self):
+        params = {}
+        if self.rng.random() < 0.5:
+            params["status"] = self.rng.choice(["Pending", "Preparing", "Delivered"])
+        query = urllib.parse.urlencode(params)
+        self.call("/admin/orders", "GET", "/admin/orders" + (f"?{query}" if query else ""))
+
+    def admin_dashboard(self):
+        self.call("/admin/dashboard", "GET", "/admin/dashboard")
+
+
+CUSTOMER_MIX = {
+    "browse_menu": 40,
+    "cart_add": 20,
+    "checkout": 10,
+    "my_orders": 20,
+    "invoice": 10,
+}
+
+ADMIN_MIX = {
+    "admin_orders": 70,
+    "admin_dashboard": 30,
+}
+
+
+def run_user(user, stop, admin):
+    user.login()
+    mix = ADMIN_MIX if admin else CUSTOMER_MIX
+    names, weights = list(mix), list(mix.values())
+    while not stop.is_set():
+        getattr(user, user.rng.choices(names, weights)[0])()
+
+# ---------------- REPORT ---------------- #
+
+class Recorder:
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds, status):
+        with self._lock:
+            self.samples[key].append(seconds * 1000)
+            if status >= 400:
+                self.errors[key] += 1
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, int(round(p / 100 * len(values))) - 1))
+    return round(values[index], 2)
+
+
+def summarize(recorder, counter, duration):
+    routes = {}
+    for key in sorted(recorder.samples):
+        samples = recorder.samples[key]
+        queries = counter.counts.get(key, [])
+        routes[key] = {
+            "requests": len(samples),
+            "errors": recorder.errors[key],
+            "throughput_rps": round(len(samples) / duration, 2),
+            "latency_ms": {
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "mean": round(sum(samples) / len(samples), 2),
+                "max": round(max(samples), 2),
+            },
+            "queries": {
+                "mean": round(sum(queries) / len(queries), 2) if queries else None,
+                "max": max(queries) if queries else None,
+            },
+        }
+
+    requests = sum(r["requests"] for r in routes.values())
+    return routes, {
+        "requests": requests,
+        "errors": sum(r["errors"] for r in routes.values()),
+        "throughput_rps": round(requests / duration, 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(routes, stream=sys.stderr):
+    print(f"{'route':<34} {'req':>6} {'err':>4} {'rps':>7} {'p50':>8} {'p95':>8} "
+          f"{'p99':>8} {'queries':>8}", file=stream)
+    for key, r in routes.items():
+        lat = r["latency_ms"]
+        print(f"{key:<34} {r['requests']:>6} {r['errors']:>4} {r['throughput_rps']:>7} "
+              f"{lat['p50']:>8} {lat['p95']:>8} {lat['p99']:>8} "
+              f"{r['queries']['mean'] if r['queries']['mean'] is not None else '-':>8}",
+              file=stream)
+
+# ---------------- MAIN ---------------- #
+
+def load_fixtures(app, count):
+    from models import Food, Order, User
+
+    with app.app_context():
+        food_ids = [food_id for (food_id,) in Food.query.with_entities(Food.id).limit(5000)]
+        customers = (
+            User.query
+            .filter(User.role == "customer", User.username.like("bench_user_%"))
+            .order_by(User.id)
+            .limit(count)
+            .all()
+        )
+        if not food_ids or len(customers) < count:
+            raise SystemExit("Not enough benchmark data; run python -m benchmarks.seed first")
+
+        fixtures = []
+        for user in customers:
+            order_ids = [
+                order_id for (order_id,) in
+                Order.query.with_entities(Order.id)
+                .filter(Order.user_id == user.id)
+                .order_by(Order.id.desc())
+                .limit(20)
+            ]
+            fixtures.append((user.username, order_ids))
+
+        # Super admin first, then restaurant admins (restaurant-scoped pages)
+        admins = ["bench_admin"] + [
+            username for (username,) in
+            User.query.with_entities(User.username)
+            .filter(User.role == "restaurant_admin",
+                    User.username.like("bench_radmin_%"),
+                    User.restaurant_id.isnot(None))
+            .order_by(User.id)
+        ]
+    return food_ids, fixtures, admins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=["test-client", "wsgi"], default="wsgi")
+    parser.add_argument("--users", type=int, default=8, help="concurrent customers")
+    parser.add_argument("--admins", type=int, default=2,
+                        help="concurrent admins (alternating super / restaurant admin)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", "-o", help="JSON report path (default: stdout)")
+    args = parser.parse_args()
+
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    rng = random.Random(args.seed)
+    food_ids, fixtures, admin_names = load_fixtures(app, args.users)
+
+    recorder = Recorder()
+    counter = QueryCounter(app)
+
+    server = None
+    if args.server == "wsgi":
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        new_session = lambda: HttpSession(base_url)
+    else:
+        new_session = lambda: TestClientSession(app)
+
+    # Even admins are the super admin, odd ones cycle through restaurant admins
+    restaurant_admins = admin_names[1:] or admin_names[:1]
+    admin_users = [
+        admin_names[0] if i % 2 == 0 else restaurant_admins[(i // 2) % len(restaurant_admins)]
+        for i in range(args.admins)
+    ]
+
+    users = [
+        (VirtualUser(new_session(), recorder, random.Random(rng.random()),
+                     username, food_ids, order_ids), False)
+        for username, order_ids in fixtures
+    ] + [
+        (VirtualUser(new_session(), recorder, random.Random(rng.random()),
+                     username, food_ids, []), True)
+        for username in admin_users
+    ]
+
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=run_user, args=(user, stop, admin), daemon=True)
+        for user, admin in users
+    ]
+    started_at = datetime.utcnow()
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.shutdown()
+
+    routes, total = summarize(recorder, counter, elapsed)
+    with app.app_context():
+        from extensions import db
+        database = db.engine.url.render_as_string(hide_password=True)
+
+    report = {
+        "meta": {
+            "started_at": started_at.isoformat(timespec="seconds") + "Z",
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "database": database,
+            "server": args.server,
+            "customers": args.users,
+            "admins": args.admins,
+            "duration_s": round(elapsed, 2),
+        },
+        "total": total,
+        "routes": routes,
+    }
+
+    print_table(routes)
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
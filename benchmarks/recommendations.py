@@ -0,0 +1,130 @@
+"""Recommendation latency: item-to-item model vs. the per-request SQL.
+
+Seeds a throwaway SQLite database with synthetic order history, then times
+``get_user_recommendations_sql`` against the precomputed model.
+
+    python -m benchmarks.recommendations --users 2000 --orders 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from flask import Flask
+from extensions import db
+from models import User, Food, Restaurant, Order, OrderItem
+from recommender import ItemRecommender
+import app as foodhub
+
+CUISINES = ["North Indian", "South Indian", "Chinese", "Italian",
+            "Mexican", "Desserts", "Beverages", "Fast Food"]
+
+
+def make_app(path):
+    bench = Flask(__name__)
+    bench.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    db.init_app(bench)
+    return bench
+
+
+def seed(users, foods, orders, restaurants=20, basket=4, rng=None):
+    rng = rng or random.Random(42)
+
+    db.session.execute(Restaurant.__table__.insert(), [
+        {"id": i, "name": f"Restaurant {i}", "rating": 4.0, "delivery_time": "30 mins"}
+        for i in range(1, restaurants + 1)
+    ])
+    db.session.execute(Food.__table__.insert(), [
+        {
+            "id": i,
+            "name": f"Dish {i}",
+            "price": rng.randint(80, 600),
+            "image": "food.jpg",
+            "cuisine": CUISINES[i % len(CUISINES)],
+            "restaurant_id": i % restaurants + 1
+        }
+        for i in range(1, foods + 1)
+    ])
+    db.session.execute(User.__table__.insert(), [
+        {"id": i, "username": f"user{i}", "password": "-", "role": "customer"}
+        for i in range(1, users + 1)
+    ])
+
+    # Skewed popularity so co-occurrence has something to find
+    weights = [1.0 / rank for rank in range(1, foods + 1)]
+    order_rows, item_rows = [], []
+    for order_id in range(1, orders + 1):
+        dishes = set(rng.choices(range(1, foods + 1), weights, k=rng.randint(1, basket)))
+        order_rows.append({
+            "id": order_id,
+            "user_id": rng.randint(1, users),
+            "total": 0,
+            "status": "Delivered",
+            "address": "-",
+            "payment_method": "cod",
+            "created_at": datetime(2024, 1, 1)
+        })
+        item_rows.extend(
+            {"order_id": order_id, "food_id": food_id,
+             "food_name": f"Dish {food_id}", "price": 100, "quantity": 1}
+            for food_id in dishes
+        )
+
+    db.session.execute(Order.__table__.insert(), order_rows)
+    db.session.execute(OrderItem.__table__.insert(), item_rows)
+    db.session.commit()
+
+
+def timed(fn, user_ids):
+    samples = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        fn(user_id)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def summary(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<22} mean {statistics.mean(samples):>10.1f} µs"
+          f"   p50 {statistics.median(samples):>10.1f} µs   p95 {p95:>10.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--foods", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bench = make_app(os.path.join(tmp, "bench.db"))
+        with bench.app_context():
+            db.create_all()
+            seed(args.users, args.foods, args.orders)
+
+            model = ItemRecommender()
+            start = time.perf_counter()
+            model.refresh()
+            build = time.perf_counter() - start
+            print(f"Model build: {build * 1000:.0f} ms "
+                  f"({args.orders} orders, {args.foods} dishes)")
+
+            rng = random.Random(7)
+            user_ids = [rng.randint(1, args.users) for _ in range(args.samples)]
+
+            sql = timed(lambda u: foodhub.get_user_recommendations_sql(u, 3), user_ids)
+            item = timed(lambda u: model.recommend(u, 3), user_ids)
+
+            summary("SQL (per request)", sql)
+            summary("Item-to-item model", item)
+            print(f"Speed-up (median): {statistics.median(sql) / statistics.median(item):.0f}x")
+            db.session.remove()
+
+
+if __name__ == "__main__":
+    main()
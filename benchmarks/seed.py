@@ -0,0 +1,259 @@
+"""Bulk-seed the configured database with synthetic FoodHub data at scale.
+
+Uses batched multi-row inserts, then rebuilds the derived tables (ratings,
+search index, dashboard rollups). Point DATABASE_URL at a scratch database:
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --orders 1000000
+
+Every seeded account's password is "bench": customers are bench_user_<n>,
+bench_admin is a super admin and bench_radmin_<n> runs restaurant <n>.
+"""
+import argparse
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models import (User, Restaurant, Food, Order, OrderItem, Review,
+                    OrderStatusHistory)
+from migrations import run_migrations
+from ratings import rebuild_ratings
+from rollups import rebuild_rollups
+from search_index import rebuild_search_index
+
+PASSWORD = "bench"
+
+CUISINES = ["North Indian", "South Indian", "Chinese", "Italian", "Mexican",
+            "Desserts", "Beverages", "Fast Food", "Thai", "Continental"]
+DISHES = ["Paneer Tikka", "Masala Dosa", "Hakka Noodles", "Margherita Pizza",
+          "Burrito Bowl", "Gulab Jamun", "Cold Coffee", "Veg Burger",
+          "Green Curry", "Pasta Alfredo", "Butter Chicken", "Biryani",
+          "Spring Rolls", "Tacos", "Brownie", "Idli Sambar"]
+
+STEPS = ["Pending", "Accepted", "Preparing", "Out for Delivery", "Delivered"]
+
+# Share of seeded orders in each final state (history = steps up to it)
+STATUS_WEIGHTS = {
+    "Delivered": 80, "Cancelled": 6, "Pending": 4,
+    "Accepted": 3, "Preparing": 3, "Out for Delivery": 4,
+}
+
+
+def insert_batched(table, rows, batch_size):
+    """Insert an iterable of dicts in ``batch_size`` executemany batches."""
+    batch, count = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(table.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        count += len(batch)
+    return count
+
+
+class Seeder:
+
+    def __init__(self, args, rng):
+        self.args = args
+        self.rng = rng
+        self.prices = []
+        self.names = []
+
+    def restaurants(self):
+        for i in range(1, self.args.restaurants + 1):
+            yield {
+                "id": i,
+                "name": f"Bench Kitchen {i}",
+                "rating": round(self.rng.uniform(3.2, 4.9), 1),
+                "delivery_time": f"{self.rng.choice([20, 25, 30, 40, 45])} mins",
+            }
+
+    def foods(self):
+        rng = self.rng
+        for i in range(1, self.args.foods + 1):
+            price = rng.randrange(60, 900, 10)
+            name = f"{rng.choice(DISHES)} {i}"
+            self.prices.append(price)
+            self.names.append(name)
+            yield {
+                "id": i,
+                "name": name,
+                "price": price,
+                "image": "https://example.com/food.jpg",
+                "cuisine": rng.choice(CUISINES),
+                "is_veg": rng.random() < 0.6,
+                "is_bestseller": rng.random() < 0.05,
+                "restaurant_id": (i - 1) % self.args.restaurants + 1,
+            }
+
+    def users(self):
+        password = generate_password_hash(PASSWORD)
+        # Every row carries every column: the executemany INSERT is
+        # compiled from the first row's keys
+        yield {"id": 1, "username": "bench_admin", "password": password,
+               "role": "super_admin", "restaurant_id": None}
+        for i in range(1, self.args.restaurants + 1):
+            yield {"id": 1 + i, "username": f"bench_radmin_{i}",
+                   "password": password, "role": "restaurant_admin",
+                   "restaurant_id": i}
+        first = self.first_customer
+        for i in range(self.args.users):
+            yield {"id": first + i, "username": f"bench_user_{i + 1}",
+                   "password": password, "role": "customer", "restaurant_id": None}
+
+    @property
+    def first_customer(self):
+        return self.args.restaurants + 2
+
+    def orders(self, items, history):
+        """Yield order rows; item and history rows go to the given lists."""
+        rng, args = self.rng, self.args
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        start = datetime.utcnow() - timedelta(days=args.days)
+        span = args.days * 86400
+        # Popular dishes get most of the orders
+        food_ids_range = range(1, args.foods + 1)
+        cum_weights = list(itertools.accumulate(
+            1 / (rank ** 0.8) for rank in food_ids_range
+        ))
+
+        for order_id in range(1, args.orders + 1):
+            created_at = start + timedelta(seconds=rng.randrange(span))
+            status = rng.choices(statuses, weights)[0]
+            food_ids = set(rng.choices(
+                food_ids_range, cum_weights=cum_weights, k=rng.randint(1, 5)
+            ))
+
+            total = 0
+            for food_id in food_ids:
+                price = self.prices[food_id - 1]
+                quantity = rng.randint(1, 3)
+                total += price * quantity
+                items.append({
+                    "order_id": order_id, "food_id": food_id,
+                    "food_name": self.names[food_id - 1], "price": price,
+                    "quantity": quantity,
+                })
+
+            steps = STEPS[:2] + ["Cancelled"] if status == "Cancelled" \
+                else STEPS[:STEPS.index(status) + 1]
+            for n, step in enumerate(steps):
+                history.append({
+                    "order_id": order_id, "status": step,
+                    "changed_at": created_at + timedelta(minutes=10 * n),
+                })
+
+            online = rng.random() < 0.5
+            yield {
+                "id": order_id,
+                "user_id": self.first_customer + rng.randrange(args.users),
+                "total": total,
+                "payment_method": "online" if online else "cod",
+                "status": status,
+                "payment_status": "Refunded" if online and status == "Cancelled" else "Paid",
+                "refund_status": "Refund Initiated (Mock)" if online and status == "Cancelled"
+                                 else "Not Applicable",
+                "created_at": created_at,
+                "address": f"{rng.randint(1, 999)} Bench Street",
+                "phone": f"9{rng.randrange(10 ** 9):09d}",
+            }
+
+    def reviews(self):
+        rng = self.rng
+        seen = set()
+        wanted = min(self.args.reviews, self.args.users * self.args.foods // 2)
+        while len(seen) < wanted:
+            user_id = self.first_customer + rng.randrange(self.args.users)
+            food_id = rng.randint(1, self.args.foods)
+            if (user_id, food_id) in seen:
+                continue
+            seen.add((user_id, food_id))
+            yield {
+                "user_id": user_id, "food_id": food_id,
+                "rating": rng.choices([1, 2, 3, 4, 5], [3, 5, 15, 37, 40])[0],
+                "comment": "Seeded review",
+            }
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+    seeder = Seeder(args, rng)
+    batch = args.batch_size
+    report = {}
+
+    def step(name, fn):
+        start = time.perf_counter()
+        count = fn()
+        db.session.commit()
+        elapsed = time.perf_counter() - start
+        report[name] = count
+        print(f"  {name:<16} {count:>10,} rows  {elapsed:7.1f}s")
+
+    step("restaurants", lambda: insert_batched(Restaurant.__table__, seeder.restaurants(), batch))
+    step("foods", lambda: insert_batched(Food.__table__, seeder.foods(), batch))
+    step("users", lambda: insert_batched(User.__table__, seeder.users(), batch))
+
+    def orders():
+        # Orders are generated in chunks so item/history lists stay bounded
+        counts = [0, 0, 0]
+        items, history = [], []
+        pending = []
+        for row in seeder.orders(items, history):
+            pending.append(row)
+            if len(pending) >= batch:
+                counts[0] += insert_batched(Order.__table__, pending, batch)
+                counts[1] += insert_batched(OrderItem.__table__, items, batch)
+                counts[2] += insert_batched(OrderStatusHistory.__table__, history, batch)
+                pending = []
+                items.clear()
+                history.clear()
+        counts[0] += insert_batched(Order.__table__, pending, batch)
+        counts[1] += insert_batched(OrderItem.__table__, items, batch)
+        counts[2] += insert_batched(OrderStatusHistory.__table__, history, batch)
+        report["order_items"], report["status_history"] = counts[1], counts[2]
+        return counts[0]
+
+    step("orders", orders)
+    print(f"  {'order items':<16} {report['order_items']:>10,} rows")
+    print(f"  {'status history':<16} {report['status_history']:>10,} rows")
+    step("reviews", lambda: insert_batched(Review.__table__, seeder.reviews(), batch))
+
+    step("ratings", rebuild_ratings)
+    step("search index", rebuild_search_index)
+    step("rollups (days)", rebuild_rollups)
+    return report
+
+
+def main():
+    from app import app
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--restaurants", type=int, default=200)
+    parser.add_argument("--foods", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--reviews", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=365,
+                        help="spread orders over this many past days")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with app.app_context():
+        run_migrations(echo=lambda line: None)
+        if User.query.filter(User.username.like("bench_%")).first():
+            parser.error("database already holds benchmark data; use a fresh DATABASE_URL")
+
+        print(f"Seeding {db.engine.url.render_as_string(hide_password=True)}")
+        start = time.perf_counter()
+        seed(args)
+        print(f"✅ Seeded in {time.perf_counter() - start:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Reader latency while a writer holds cart transactions, rollback journal vs. WAL.
+
+Separate processes share one database file, as gunicorn workers do: one
+applies cart batches, one runs a slow report query (an admin page scanning
+every cart line) and the rest compute cart summaries. With the old rollback
+journal a commit has to wait for the report to finish, and every new reader
+queues behind that pending commit; with the db_config pragmas (WAL) readers
+keep reading the last committed state and nobody waits.
+
+    python -m benchmarks.sqlite_concurrency --seconds 5 --readers 4
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from db_config import apply_sqlite_pragmas, sqlite_pragmas
+from extensions import db
+from models import Cart, Food
+
+cart = Cart.__table__
+food = Food.__table__
+
+
+def make_engine(path, journal_mode):
+    engine = create_engine("sqlite:///" + path)
+    pragmas = sqlite_pragmas()
+    pragmas["journal_mode"] = journal_mode
+    if journal_mode != "WAL":
+        pragmas["synchronous"] = "FULL"  # SQLite's default outside WAL
+    apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def seed(engine, users, foods):
+    db.metadata.create_all(engine, tables=[food, cart])
+    with engine.begin() as conn:
+        conn.execute(food.insert(), [
+            {"id": i, "name": f"Dish {i}", "price": 100 + i} for i in range(1, foods + 1)
+        ])
+        conn.execute(cart.insert(), [
+            {"user_id": u, "food_id": f, "quantity": 1}
+            for u in range(1, users + 1) for f in range(1, 6)
+        ])
+
+
+def writer(path, journal_mode, start, stop, users, batch, counts):
+    engine = make_engine(path, journal_mode)
+    start.wait()
+    n = 0
+    while not stop.is_set():
+        with engine.begin() as conn:
+            for i in range(batch):
+                user_id = (n * batch + i) % users + 1
+                conn.execute(
+                    cart.update()
+                    .where(cart.c.user_id == user_id)
+                    .values(quantity=cart.c.quantity + 1)
+                )
+        n += 1
+    counts.put(n)
+
+
+def reader(path, journal_mode, start, stop, users, think, results):
+    engine = make_engine(path, journal_mode)
+    summary = (
+        select(func.sum(cart.c.quantity), func.sum(cart.c.quantity * food.c.price))
+        .select_from(cart.join(food, food.c.id == cart.c.food_id))
+    )
+    samples, errors, user_id = [], 0, 0
+    with engine.connect() as conn:
+        start.wait()
+        while not stop.is_set():
+            user_id = user_id % users + 1
+            start = time.perf_counter()
+            try:
+                conn.execute(summary.where(cart.c.user_id == user_id)).one()
+            except OperationalError:
+                errors += 1
+            conn.rollback()
+            samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(think)
+    results.put((samples, errors))
+
+
+def report(path, journal_mode, start, stop):
+    engine = make_engine(path, journal_mode)
+    per_dish = (
+        select(cart.c.food_id, func.sum(cart.c.quantity * food.c.price))
+        .select_from(cart.join(food, food.c.id == cart.c.food_id))
+        .group_by(cart.c.food_id)
+        .order_by(func.sum(cart.c.quantity).desc())
+    )
+    with engine.connect() as conn:
+        start.wait()
+        while not stop.is_set():
+            conn.execute(per_dish).all()
+            conn.rollback()
+            time.sleep(0.01)
+
+
+def run(journal_mode, args):
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = make_engine(path, journal_mode)
+        seed(engine, args.users, 50)
+        engine.dispose()
+
+        start = ctx.Barrier(args.readers + 3)
+        stop, counts, results = ctx.Event(), ctx.Queue(), ctx.Queue()
+        workers = [ctx.Process(target=writer, args=(
+            path, journal_mode, start, stop, args.users, args.batch, counts
+        )), ctx.Process(target=report, args=(path, journal_mode, start, stop))] + [
+            ctx.Process(target=reader, args=(
+                path, journal_mode, start, stop, args.users, args.think / 1000, results
+            ))
+            for _ in range(args.readers)
+        ]
+        for w in workers:
+            w.start()
+        start.wait()
+        time.sleep(args.seconds)
+        stop.set()
+
+        samples, errors = [], 0
+        for _ in range(args.readers):
+            s, e = results.get()
+            samples.extend(s)
+            errors += e
+        writes = counts.get()
+        for w in workers:
+            w.join()
+
+    samples.sort()
+    pct = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    print(f"{journal_mode:<7} reads {len(samples) / args.seconds:>8.0f}/s"
+          f"   p50 {pct(0.50):>7.2f} ms   p99 {pct(0.99):>7.2f} ms"
+          f"   max {samples[-1]:>7.2f} ms   busy errors {errors}"
+          f"   write txns {writes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=200,
+                        help="cart updates per write transaction")
+    parser.add_argument("--think", type=float, default=2,
+                        help="ms each reader waits between requests")
+    parser.add_argument("--dir", help="where to put the database (default: temp dir)")
+    args = parser.parse_args()
+
+    for journal_mode in ("DELETE", "WAL"):
+        run(journal_mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import func
+from extensions import db
+from models import Cart, Food
+from catalog import catalog_cache
+from db_helpers import upsert_increment
+
+# ---------------- CART SUMMARY ---------------- #
+
+CartSummary = namedtuple("CartSummary", "count subtotal")
+
+EMPTY_CART_SUMMARY = CartSummary(count=0, subtotal=0)
+
+
+def compute_cart_summary(user_id):
+    count, subtotal = (
+        db.session.query(
+            func.coalesce(func.sum(Cart.quantity), 0),
+            func.coalesce(func.sum(Cart.quantity * Food.price), 0)
+        )
+        .outerjoin(Food, Food.id == Cart.food_id)
+        .filter(Cart.user_id == user_id)
+        .one()
+    )
+    return CartSummary(count=int(count), subtotal=float(subtotal))
+
+
+class CartSummaryCache:
+    """Per-user cart summaries, dropped by the cart mutation routes.
+
+    Entries also expire when the catalog version changes (prices) and after
+    ``ttl`` seconds, which bounds staleness when another worker process
+    changed the cart.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                version, expires, summary = entry
+                if version == catalog_cache.version and expires > now:
+                    self._entries.move_to_end(user_id)
+                    return summary
+            generation = self._generations.get(user_id, 0)
+            version = catalog_cache.version
+
+        summary = compute_cart_summary(user_id)
+
+        with self._lock:
+            # Skip the store if the cart changed while we were reading it
+            if self._generations.get(user_id, 0) == generation:
+                self._entries[user_id] = (version, now + self.ttl, summary)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return summary
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def refresh(self, user_id):
+        """Invalidate and return the fresh summary (for AJAX responses)."""
+        self.invalidate(user_id)
+        return self.get(user_id)
+
+
+cart_summaries = CartSummaryCache()
+
+
+class LazyCartSummary:
+    """Template-facing summary that only hits the cache/DB when read."""
+
+    def __init__(self, user_id):
+        self._user_id = user_id
+        self._summary = None
+
+    def _load(self):
+        if self._summary is None:
+            self._summary = cart_summaries.get(self._user_id)
+        return self._summary
+
+    @property
+    def count(self):
+        return self._load().count
+
+    @property
+    def subtotal(self):
+        return self._load().subtotal
+
+# ---------------- CART MUTATIONS ---------------- #
+
+# Every mutation is a single statement (or an UPDATE followed by a guarded
+# DELETE), so concurrent clicks never lose increments. Callers commit.
+
+cart_table = Cart.__table__
+
+
+def add_to_cart(user_id, food_id, quantity=1):
+    """Add ``quantity`` of a dish; returns the new line quantity."""
+    return upsert_increment(
+        Cart,
+        {"user_id": user_id, "food_id": food_id},
+        {"quantity": quantity},
+        returning="quantity"
+    )
+
+
+def _decrement(criteria, quantity):
+    """Decrement the matching line, deleting it when it would reach zero.
+
+    Returns the remaining quantity (0 when the line is gone).
+    """
+    stmt = (
+        cart_table.update()
+        .where(*criteria, cart_table.c.quantity > quantity)
+        .values(quantity=cart_table.c.quantity - quantity)
+    )
+    if db.session.get_bind(mapper=Cart).dialect.update_returning:
+        remaining = db.session.execute(
+            stmt.returning(cart_table.c.quantity)
+        ).scalar()
+    elif db.session.execute(stmt).rowcount:
+        remaining = db.session.execute(
+            cart_table.select()
+            .with_only_columns(cart_table.c.quantity)
+            .where(*criteria)
+        ).scalar()
+    else:
+        remaining = None
+
+    if remaining is not None:
+        return remaining
+
+    db.session.execute(
+        cart_table.delete()
+        .where(*criteria, cart_table.c.quantity <= quantity)
+    )
+    return 0
+
+
+def remove_from_cart(user_id, food_id, quantity=1):
+    return _decrement(
+        [cart_table.c.user_id == user_id, cart_table.c.food_id == food_id],
+        quantity
+    )
+
+
+def increment_line(user_id, line_id, quantity=1):
+    db.session.execute(
+        cart_table.update()
+        .where(cart_table.c.id == line_id, cart_table.c.user_id == user_id)
+        .values(quantity=cart_table.c.quantity + quantity)
+    )
+
+
+def decrement_line(user_id, line_id, quantity=1):
+    return _decrement(
+        [cart_table.c.id == line_id, cart_table.c.user_id == user_id],
+        quantity
+    )
+
+
+def delete_line(user_id, line_id):
+    db.session.execute(
+        cart_table.delete()
+        .where(cart_table.c.id == line_id, cart_table.c.user_id == user_id)
+    )
+
+
+def apply_cart_changes(user_id, changes):
+    """Apply ``{food_id: delta}`` in the caller's transaction.
+
+    Returns ``{food_id: new_quantity}``. Raises ValueError for unknown dishes.
+    """
+    changes = {food_id: delta for food_id, delta in changes.items() if delta}
+    if not changes:
+        return {}
+
+    known = {
+        food_id for (food_id,) in
+        db.session.query(Food.id).filter(Food.id.in_(changes)).all()
+    }
+    unknown = sorted(set(changes) - known)
+    if unknown:
+        raise ValueError(f"Unknown food ids: {unknown}")
+
+    quantities = {}
+    for food_id, delta in sorted(changes.items()):
+        if delta > 0:
+            quantities[food_id] = add_to_cart(user_id, food_id, delta)
+        else:
+            quantities[food_id] = remove_from_cart(user_id, food_id, -delta)
+    return quantities
@@ -0,0 +1,363 @@
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from dataclasses import dataclass
+from sqlalchemy import func, or_, tuple_
+from sqlalchemy.orm import joinedload
+from extensions import db
+from db_routing import use_primary
+from models import Food, FoodRating, Restaurant
+from search_index import search_hits
+
+# ---------------- FILTERS ---------------- #
+
+MenuFilters = namedtuple(
+    "MenuFilters",
+    "search cuisine food_type min_price max_price sort"
+)
+
+
+def menu_filters_from_args(args):
+    """Normalize the /menu query string so equivalent URLs share a cache key."""
+    food_type = args.get('type', '')
+    sort = args.get('sort', '')
+
+    return MenuFilters(
+        search=args.get('search', '').strip().lower(),
+        cuisine=args.get('cuisine') or '',
+        food_type=food_type if food_type in ('veg', 'nonveg') else '',
+        min_price=args.get('min_price', type=float),
+        max_price=args.get('max_price', type=float),
+        sort=sort if sort in ('low', 'high') else ''
+    )
+
+
+def apply_menu_filters(query, filters):
+    """Apply the /menu filters to ``query``.
+
+    Returns ``(query, hits)`` where ``hits`` is the FTS5 subquery joined for a
+    search (None otherwise), so callers can order by its score.
+    """
+    # 1️⃣ Search text (dish name + cuisine + restaurant), ranked by FTS5
+    hits = search_hits(filters.search) if filters.search else None
+    if hits is not None:
+        query = query.join(hits, hits.c.food_id == Food.id)
+    elif filters.search:
+        search_term = f"%{filters.search}%"
+        query = query.filter(
+            or_(
+                Food.name.ilike(search_term),
+                Food.cuisine.ilike(search_term)
+            )
+        )
+    if filters.cuisine:
+        query = query.filter(Food.cuisine == filters.cuisine)
+
+    # 2️⃣ Veg / Non-Veg filter
+    if filters.food_type == "veg":
+        query = query.filter(Food.is_veg == True)
+    elif filters.food_type == "nonveg":
+        query = query.filter(Food.is_veg == False)
+
+    # 3️⃣ Price range filter
+    if filters.min_price is not None:
+        query = query.filter(Food.price >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.filter(Food.price <= filters.max_price)
+
+    return query, hits
+
+
+def build_menu_query(filters):
+    query, hits = apply_menu_filters(
+        Food.query.options(joinedload(Food.restaurant)), filters
+    )
+
+    # 4️⃣ Sort by price
+    if filters.sort == 'low':
+        query = query.order_by(Food.price.asc())
+    elif filters.sort == 'high':
+        query = query.order_by(Food.price.desc())
+    elif hits is not None:
+        query = query.order_by(hits.c.score, Food.id)
+
+    return query
+
+# ---------------- SNAPSHOTS ---------------- #
+
+# Cached rows are plain frozen objects, never ORM instances: they outlive the
+# session that loaded them and are shared between concurrent requests.
+
+@dataclass(frozen=True)
+class CachedRestaurant:
+    id: int
+    name: str
+    rating: float
+    delivery_time: str
+
+
+@dataclass(frozen=True)
+class CachedFood:
+    id: int
+    name: str
+    price: float
+    image: str
+    cuisine: str
+    is_veg: bool
+    is_bestseller: bool
+    restaurant_id: int
+
+
+MenuCatalog = namedtuple("MenuCatalog", "foods restaurants cuisines")
+
+
+def _cached_food(food):
+    return CachedFood(
+        id=food.id,
+        name=food.name,
+        price=food.price,
+        image=food.image,
+        cuisine=food.cuisine,
+        is_veg=food.is_veg,
+        is_bestseller=food.is_bestseller,
+        restaurant_id=food.restaurant_id
+    )
+
+
+def _snapshot_menu(filters):
+    foods = []
+    restaurants = {}
+    cuisines = {}
+    snapshots = {}
+
+    for food in build_menu_query(filters).all():
+        cached = _cached_food(food)
+        foods.append(cached)
+
+        # ---------------- RESTAURANT GROUPING ----------------
+        if food.restaurant:
+            restaurant = snapshots.get(food.restaurant.id)
+            if restaurant is None:
+                restaurant = snapshots[food.restaurant.id] = CachedRestaurant(
+                    id=food.restaurant.id,
+                    name=food.restaurant.name,
+                    rating=food.restaurant.rating,
+                    delivery_time=food.restaurant.delivery_time
+                )
+            restaurants.setdefault(restaurant, []).append(cached)
+
+        # ---------------- CUISINE GROUPING ----------------
+        cuisines.setdefault(cached.cuisine, []).append(cached)
+
+    return MenuCatalog(foods=foods, restaurants=restaurants, cuisines=cuisines)
+
+
+def _snapshot_foods():
+    return {food.id: _cached_food(food) for food in Food.query.all()}
+
+
+def _snapshot_cuisines():
+    rows = db.session.query(Food.cuisine).distinct().all()
+    return [c[0] for c in rows]
+
+# ---------------- CACHE ---------------- #
+
+class CatalogCache:
+    """LRU cache for catalog reads, invalidated by bumping ``version``.
+
+    The cache lives in process memory, so a bump only reaches the worker
+    that made it. Every ``ttl`` seconds (CATALOG_CACHE_TTL, default 60) the
+    cache also bumps itself, which bounds how long other workers serve a
+    menu that was edited elsewhere.
+    """
+
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._expires = time.monotonic() + ttl
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = float(app.config.setdefault(
+            'CATALOG_CACHE_TTL', os.environ.get('CATALOG_CACHE_TTL', 60)
+        ))
+        with self._lock:
+            self._expires = time.monotonic() + self.ttl
+
+    def _expire(self):
+        # Caller holds the lock
+        now = time.monotonic()
+        if now >= self._expires:
+            self.version += 1
+            self._entries.clear()
+            self._expires = now + self.ttl
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            self._expire()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            version = self.version
+
+        # Shared by every user, so never filled from a lagging replica
+        with use_primary():
+            value = loader()
+
+        with self._lock:
+            # Drop results computed against a catalog that changed meanwhile
+            if version == self.version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def current_version(self):
+        """``version``, after dropping entries older than ``ttl``."""
+        with self._lock:
+            self._expire()
+            return self.version
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._expires = time.monotonic() + self.ttl
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+catalog_cache = CatalogCache()
+
+
+def load_menu_catalog(filters):
+    return catalog_cache.get_or_load(
+        ("menu", filters), lambda: _snapshot_menu(filters)
+    )
+
+
+def load_all_cuisines():
+    return catalog_cache.get_or_load(("cuisines",), _snapshot_cuisines)
+
+
+def load_food_index():
+    """``{food_id: CachedFood}`` for every dish."""
+    return catalog_cache.get_or_load(("foods",), _snapshot_foods)
+
+# ---------------- JSON API PAGES ---------------- #
+
+# Fields a client may request from /api/menu
+MENU_API_FIELDS = {
+    "id": Food.id,
+    "name": Food.name,
+    "price": Food.price,
+    "image": Food.image,
+    "cuisine": Food.cuisine,
+    "is_veg": Food.is_veg,
+    "is_bestseller": Food.is_bestseller,
+    "restaurant_id": Food.restaurant_id,
+    "restaurant": Restaurant.name,
+    "rating": func.round(
+        FoodRating.rating_sum * 1.0 / func.nullif(FoodRating.rating_count, 0), 1
+    ),
+    "reviews": func.coalesce(FoodRating.rating_count, 0),
+}
+
+MENU_API_MAX_LIMIT = 100
+
+
+def _page_order(filters, hits):
+    """Keyset columns and direction for the requested ordering."""
+    if filters.sort == 'low':
+        return "price", [Food.price, Food.id], False
+    if filters.sort == 'high':
+        return "price_desc", [Food.price, Food.id], True
+    if hits is not None:
+        return "relevance", [hits.c.score, Food.id], False
+    return "restaurant", [Food.restaurant_id, Food.id], False
+
+
+def encode_cursor(order, values):
+    raw = json.dumps({"o": order, "k": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, order, size=2):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["o"] != order or len(data["k"]) != size:
+            raise ValueError
+        return data["k"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor for this query")
+
+
+def load_menu_page(filters, fields=None, cursor=None, limit=20):
+    """One keyset-paginated page of the filtered catalog.
+
+    Only the requested ``fields`` are selected. Raises ValueError for unknown
+    fields or a cursor that does not belong to this ordering.
+    """
+    fields = fields or list(MENU_API_FIELDS)
+    unknown = [f for f in fields if f not in MENU_API_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    limit = max(1, min(limit, MENU_API_MAX_LIMIT))
+
+    query = db.session.query(Food)
+    if "restaurant" in fields:
+        query = query.outerjoin(Restaurant, Restaurant.id == Food.restaurant_id)
+    if "rating" in fields or "reviews" in fields:
+        query = query.outerjoin(FoodRating, FoodRating.food_id == Food.id)
+
+    query, hits = apply_menu_filters(query, filters)
+    order, keys, descending = _page_order(filters, hits)
+
+    if cursor:
+        last = tuple_(*decode_cursor(cursor, order))
+        query = query.filter(
+            tuple_(*keys) < last if descending else tuple_(*keys) > last
+        )
+
+    rows = (
+        query
+        .with_entities(*keys, *[MENU_API_FIELDS[f].label(f) for f in fields])
+        .order_by(*[k.desc() if descending else k.asc() for k in keys])
+        .limit(limit + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(order, rows[-1][:2])
+
+    return {
+        "items": [dict(zip(fields, row[2:])) for row in rows],
+        "next_cursor": next_cursor
+    }
@@ -0,0 +1,312 @@
+import csv
+import io
+import json
+from collections import namedtuple
+from sqlalchemy import bindparam, select
+from extensions import db
+from models import Cart, DailyFoodSales, Food, FoodRating, OrderItem, Review
+from search_index import index_foods, unindex_foods
+
+# Bulk import / export of one restaurant's dishes (CSV or JSON).
+#
+# Rows with an ``id`` update that dish (only the columns present in the file),
+# rows without one create a dish, and rows with ``action`` = "delete" remove
+# it. Everything is validated first; a file with any bad row changes nothing.
+
+EXPORT_FIELDS = ["id", "name", "price", "image", "cuisine", "is_veg", "is_bestseller"]
+
+EDITABLE_FIELDS = ["name", "price", "image", "cuisine", "is_veg", "is_bestseller"]
+
+MAX_ROWS = 5000
+
+CHUNK_SIZE = 500
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+FALSE_VALUES = {"0", "false", "no", "n", ""}
+
+ImportPlan = namedtuple("ImportPlan", "creates updates deletes unchanged errors")
+
+
+class CatalogImportError(ValueError):
+    pass
+
+
+# ---------------- EXPORT ---------------- #
+
+def export_rows(restaurant_id):
+    foods = (
+        Food.query
+        .filter_by(restaurant_id=restaurant_id)
+        .order_by(Food.id)
+        .all()
+    )
+    return [{field: getattr(food, field) for field in EXPORT_FIELDS} for food in foods]
+
+
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({
+            **row,
+            "is_veg": int(bool(row["is_veg"])),
+            "is_bestseller": int(bool(row["is_bestseller"]))
+        })
+    return buffer.getvalue()
+
+# ---------------- PARSING ---------------- #
+
+def parse_rows(data, fmt):
+    """Rows (dicts) from CSV text or a JSON list / {"foods": [...]}."""
+    if fmt == "json":
+        try:
+            payload = json.loads(data) if isinstance(data, str) else data
+        except ValueError:
+            raise CatalogImportError("File is not valid JSON")
+        if isinstance(payload, dict):
+            payload = payload.get("foods")
+        if not isinstance(payload, list) or not all(isinstance(r, dict) for r in payload):
+            raise CatalogImportError('JSON must be a list of dishes or {"foods": [...]}')
+        rows = payload
+    else:
+        rows = list(csv.DictReader(io.StringIO(data.lstrip("﻿"))))
+
+    if len(rows) > MAX_ROWS:
+        raise CatalogImportError(f"At most {MAX_ROWS} rows per import")
+    return rows
+
+
+def _food_id(value):
+    if value in (None, ""):
+        return None
+    # int() would quietly turn 1.5 (or true) into dish 1
+    if isinstance(value, int) and not isinstance(value, bool):
+        food_id = value
+    elif isinstance(value, str) and value.strip().isdigit():
+        food_id = int(value)
+    else:
+        raise ValueError("id must be a whole number")
+    if food_id < 1:
+        raise ValueError("id must be a whole number")
+    return food_id
+
+
+def _text(value, field, max_length, required):
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f"{field} is required")
+    if len(value) > max_length:
+        raise ValueError(f"{field} is longer than {max_length} characters")
+    return value
+
+
+def _price(value):
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("price must be a number")
+    if not 0 <= price <= 100000:
+        raise ValueError("price must be between 0 and 100000")
+    return price
+
+
+def _flag(value, field):
+    if isinstance(value, bool):
+        return value
+    value = "" if value is None else str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"{field} must be true/false")
+
+
+def _clean(row, required):
+    """Validated editable fields present in ``row``."""
+    cleaned = {}
+    for field in EDITABLE_FIELDS:
+        # Blank cells leave the column as it is
+        if row.get(field) in (None, ""):
+            continue
+        value = row[field]
+        if field == "price":
+            cleaned[field] = _price(value)
+        elif field in ("is_veg", "is_bestseller"):
+            cleaned[field] = _flag(value, field)
+        elif field == "name":
+            cleaned[field] = _text(value, field, 100, True)
+        elif field == "cuisine":
+            cleaned[field] = _text(value, field, 50, True)
+        else:
+            cleaned[field] = _text(value, field, 255, False)
+
+    if required:
+        for field in ("name", "price", "cuisine"):
+            if field not in cleaned:
+                raise ValueError(f"{field} is required for new dishes")
+        cleaned.setdefault("image", "")
+        cleaned.setdefault("is_veg", True)
+        cleaned.setdefault("is_bestseller", False)
+    return cleaned
+
+# ---------------- PLAN (DRY RUN) ---------------- #
+
+def plan_import(rows, restaurant_id):
+    """Validate ``rows`` against the restaurant's current dishes.
+
+    Reads the restaurant's dishes in one query; writes nothing.
+    """
+    existing = {
+        food.id: food for food in
+        Food.query.filter_by(restaurant_id=restaurant_id).all()
+    }
+
+    creates, updates, deletes, errors = [], [], [], []
+    unchanged = 0
+    seen = set()
+
+    # Row numbers match the file: CSV data starts on line 2
+    for number, row in enumerate(rows, start=2):
+        try:
+            food_id = _food_id(row.get("id"))
+            action = str(row.get("action") or "upsert").strip().lower()
+            if action not in ("upsert", "delete"):
+                raise ValueError('action must be "upsert" or "delete"')
+
+            if food_id is None:
+                if action == "delete":
+                    raise ValueError("delete needs an id")
+                creates.append(_clean(row, required=True))
+                continue
+
+            food = existing.get(food_id)
+            if food is None:
+                raise ValueError(f"dish {food_id} is not on this restaurant's menu")
+            if food_id in seen:
+                raise ValueError(f"dish {food_id} appears more than once")
+            seen.add(food_id)
+
+            if action == "delete":
+                deletes.append({"id": food_id, "name": food.name})
+                continue
+
+            changes = {
+                field: [getattr(food, field), value]
+                for field, value in _clean(row, required=False).items()
+                if getattr(food, field) != value
+            }
+            if changes:
+                updates.append({"id": food_id, "name": food.name, "changes": changes})
+            else:
+                unchanged += 1
+        except ValueError as e:
+            errors.append({"row": number, "error": str(e)})
+
+    return ImportPlan(creates, updates, deletes, unchanged, errors)
+
+
+def plan_summary(plan):
+    return {
+        "create": len(plan.creates),
+        "update": len(plan.updates),
+        "delete": len(plan.deletes),
+        "unchanged": plan.unchanged,
+        "errors": len(plan.errors)
+    }
+
+# ---------------- APPLY ---------------- #
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _insert_foods(rows):
+    table = Food.__table__
+    dialect = db.session.get_bind(mapper=Food).dialect
+    if dialect.insert_executemany_returning:
+        return list(db.session.execute(
+            table.insert().returning(table.c.id), rows
+        ).scalars())
+    return [
+        db.session.execute(table.insert().values(**row)).inserted_primary_key[0]
+        for row in rows
+    ]
+
+
+def delete_foods(food_ids, restaurant_id=None):
+    """Delete dishes and the rows that point at them, in chunks.
+
+    Cart lines, reviews, rating stats and per-dish sales rollups go with the
+    dish. Order items keep their copied name and price for order history
+    and only lose the link. Returns the ids of users whose carts changed.
+    """
+    table = Food.__table__
+    cart = Cart.__table__
+    cart_user_ids = set()
+
+    for chunk in _chunks(list(food_ids)):
+        if restaurant_id is not None:
+            chunk = db.session.execute(
+                select(table.c.id).where(table.c.id.in_(chunk),
+                                         table.c.restaurant_id == restaurant_id)
+            ).scalars().all()
+            if not chunk:
+                continue
+
+        cart_user_ids.update(db.session.execute(
+            select(cart.c.user_id).where(cart.c.food_id.in_(chunk)).distinct()
+        ).scalars())
+        db.session.execute(cart.delete().where(cart.c.food_id.in_(chunk)))
+        for model in (Review, FoodRating, DailyFoodSales):
+            dependent = model.__table__
+            db.session.execute(dependent.delete().where(dependent.c.food_id.in_(chunk)))
+        db.session.execute(
+            OrderItem.__table__.update()
+            .where(OrderItem.__table__.c.food_id.in_(chunk))
+            .values(food_id=None)
+        )
+        db.session.execute(table.delete().where(table.c.id.in_(chunk)))
+    return cart_user_ids
+
+
+def apply_import(plan, restaurant_id):
+    """Apply a validated plan in the caller's transaction, in chunks.
+
+    Returns the ids of created dishes and of the users whose carts lost a
+    deleted dish. The caller commits and then invalidates the caches once.
+    """
+    table = Food.__table__
+    created_ids = []
+
+    for chunk in _chunks(plan.creates):
+        created_ids += _insert_foods([
+            {**row, "restaurant_id": restaurant_id} for row in chunk
+        ])
+
+    # One executemany per set of changed columns
+    by_columns = {}
+    for update in plan.updates:
+        by_columns.setdefault(tuple(sorted(update["changes"])), []).append(update)
+
+    for columns, updates in by_columns.items():
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("food_id"),
+                   table.c.restaurant_id == restaurant_id)
+            .values({column: bindparam(column) for column in columns})
+        )
+        for chunk in _chunks(updates):
+            db.session.execute(stmt, [
+                {"food_id": u["id"], **{c: u["changes"][c][1] for c in columns}}
+                for u in chunk
+            ])
+
+    deleted_ids = [d["id"] for d in plan.deletes]
+    cart_user_ids = delete_foods(deleted_ids, restaurant_id)
+
+    # Search index, once for the whole import
+    index_foods(created_ids + [u["id"] for u in plan.updates])
+    unindex_foods(deleted_ids)
+    return created_ids, cart_user_ids
@@ -0,0 +1,110 @@
+import click
+from extensions import db
+from db_routing import REPLICA_BIND
+from rollups import rebuild_rollups
+from ratings import rebuild_ratings
+from search_index import rebuild_search_index
+from migrations import run_migrations, pending_migrations, route_query_plans
+from invoice_export import iter_invoice_snapshots, stream_invoice_zip
+from assets import assets, build_assets
+
+# Maintenance commands, run with: flask --app app <command>
+
+
+def _echo_plans(before, after):
+    for name, plan in after.items():
+        click.echo(f"\n▶ {name}")
+        if before.get(name) == plan:
+            click.echo("  (unchanged)")
+        else:
+            for line in before.get(name, []):
+                click.echo(f"  before: {line}")
+        for line in plan:
+            click.echo(f"  after:  {line}")
+
+
+def register_commands(app):
+
+    @app.cli.command("migrate")
+    @click.option("--explain/--no-explain", default=True, show_default=True,
+                  help="Print route query plans before and after.")
+    def migrate_command(explain):
+        """Apply pending schema migrations."""
+        db.create_all()
+        if not pending_migrations():
+            click.echo("✅ Database is up to date")
+            return
+
+        before = route_query_plans() if explain else {}
+        applied = run_migrations(echo=click.echo)
+        click.echo(f"✅ {len(applied)} migration(s) applied")
+
+        if explain:
+            _echo_plans(before, route_query_plans())
+
+    @app.cli.command("sync-replica")
+    def sync_replica_command():
+        """Copy the primary SQLite database onto the replica (local stand-in)."""
+        replica = db.engines.get(REPLICA_BIND)
+        if replica is None:
+            raise click.ClickException("DATABASE_REPLICA_URL is not set")
+        if db.engine.dialect.name != "sqlite" or replica.dialect.name != "sqlite":
+            raise click.ClickException(
+                "Only SQLite files can be copied; use streaming replication for PostgreSQL"
+            )
+
+        source, target = db.engine.raw_connection(), replica.raw_connection()
+        try:
+            source.driver_connection.backup(target.driver_connection)
+        finally:
+            source.close()
+            target.close()
+        click.echo(f"✅ Replica refreshed from {db.engine.url.database}")
+
+    @app.cli.command("rebuild-ratings")
+    def rebuild_ratings_command():
+        """Recompute the per-dish rating stats from reviews."""
+        count = rebuild_ratings()
+        click.echo(f"✅ Rating stats rebuilt for {count} dishes")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command():
+        """Rebuild the full-text menu search index."""
+        count = rebuild_search_index()
+        if count is None:
+            click.echo("ℹ️ Full-text search needs SQLite; menu search uses ILIKE here")
+        else:
+            click.echo(f"✅ Search index rebuilt for {count} dishes")
+
+    @app.cli.command("rebuild-rollups")
+    def rebuild_rollups_command():
+        """Backfill the dashboard rollup tables from order history."""
+        db.create_all()
+        days = rebuild_rollups()
+        click.echo(f"✅ Dashboard rollups rebuilt for {days} days")
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        """Minify, fingerprint and precompress static CSS/JS."""
+        manifest = build_assets(app.static_folder, echo=click.echo)
+        assets.load()
+        click.echo(f"✅ {len(manifest)} assets built into static/dist")
+
+    @app.cli.command("export-invoices")
+    @click.option("--from", "date_from", type=click.DateTime(["%Y-%m-%d"]),
+                  help="First order day (inclusive).")
+    @click.option("--to", "date_to", type=click.DateTime(["%Y-%m-%d"]),
+                  help="Last order day (inclusive).")
+    @click.option("--restaurant", "restaurant_id", type=int,
+                  help="Only orders with items from this restaurant.")
+    @click.option("--workers", type=int, help="Render processes.")
+    @click.option("--output", "-o", default="invoices.zip", show_default=True)
+    def export_invoices_command(date_from, date_to, restaurant_id, workers, output):
+        """Write a ZIP of invoice PDFs for a date range."""
+        snapshots = iter_invoice_snapshots(date_from, date_to, restaurant_id)
+        size = 0
+        with open(output, "wb") as f:
+            for chunk in stream_invoice_zip(snapshots, workers=workers):
+                f.write(chunk)
+                size += len(chunk)
+        click.echo(f"✅ Invoices written to {output} ({size // 1024} KB)")
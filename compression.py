@@ -0,0 +1,143 @@
+import os
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Response compression for text responses (HTML, JSON, CSS/JS, CSV).
+#
+# Buffered bodies are compressed in one go when they are at least
+# COMPRESS_MIN_SIZE bytes. Streamed bodies are compressed chunk by chunk and
+# flushed after every chunk, so a streamed page still arrives progressively.
+# Responses that already carry a Content-Encoding (precompressed assets),
+# file responses (invoice PDFs, send_file) and non-text types are left alone.
+#
+#   COMPRESS_MIN_SIZE       smallest buffered body worth compressing (default 500)
+#   COMPRESS_GZIP_LEVEL     zlib level (default 6)
+#   COMPRESS_BROTLI_QUALITY brotli quality (default 4; 11 is for build time)
+
+COMPRESSIBLE_TYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+}
+
+# ---------------- ENCODERS ---------------- #
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level):
+        # wbits=31: gzip header and trailer
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+# ---------------- MIDDLEWARE ---------------- #
+
+class Compressor:
+
+    def __init__(self):
+        self.min_size = 500
+        self.gzip_level = 6
+        self.brotli_quality = 4
+
+    def init_app(self, app):
+        self.min_size = int(app.config.setdefault(
+            'COMPRESS_MIN_SIZE', os.environ.get('COMPRESS_MIN_SIZE', 500)
+        ))
+        self.gzip_level = int(app.config.setdefault('COMPRESS_GZIP_LEVEL', 6))
+        self.brotli_quality = int(app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4))
+        app.after_request(self.compress_response)
+
+    def encoder_for(self, accept_encodings):
+        if brotli is not None and accept_encodings["br"]:
+            return BrotliEncoder(self.brotli_quality)
+        if accept_encodings["gzip"]:
+            return GzipEncoder(self.gzip_level)
+        return None
+
+    def compress_response(self, response):
+        if (
+            response.mimetype not in COMPRESSIBLE_TYPES
+            or "Content-Encoding" in response.headers
+            or response.direct_passthrough
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or request.method == "HEAD"
+            or "no-transform" in (response.headers.get("Cache-Control") or "")
+        ):
+            return response
+
+        # Caches must keep compressed and plain copies apart
+        response.vary.add("Accept-Encoding")
+
+        encoder = self.encoder_for(request.accept_encodings)
+        if encoder is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(response.response, encoder)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(encoder.compress(data) + encoder.finish())
+
+        response.headers["Content-Encoding"] = encoder.name
+        # The bytes differ from the identity body, so only a weak match holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    @staticmethod
+    def _stream(chunks, encoder):
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                data = encoder.compress(chunk) + encoder.flush()
+                if data:
+                    yield data
+            yield encoder.finish()
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+
+compressor = Compressor()
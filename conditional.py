@@ -0,0 +1,69 @@
+import hashlib
+import os
+import uuid
+from datetime import timezone
+from flask import make_response, request, session
+
+# Conditional GET: routes compute a cheap validator *before* rendering and
+# answer 304 Not Modified when the client already has that version.
+#
+# ETags are weak (the body may be served gzipped or not) and salted with
+# RELEASE so a deploy with new templates never matches an old ETag. Without
+# RELEASE every process picks its own salt, which is always correct but
+# means workers cannot 304 each other's responses.
+
+RELEASE = os.environ.get("RELEASE") or uuid.uuid4().hex
+
+# In-process state (e.g. the catalog cache version) only means something in
+# the process that produced it, so validators built on it add this as well
+BOOT_NONCE = uuid.uuid4().hex
+
+
+def make_etag(*parts):
+    raw = repr((RELEASE,) + parts).encode()
+    return hashlib.sha1(raw).hexdigest()[:24]
+
+
+def args_digest(args):
+    """Order-independent digest of query-string filters."""
+    items = sorted(args.items(multi=True))
+    return hashlib.sha1(repr(items).encode()).hexdigest()[:16]
+
+
+def _utc(value):
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = _utc(last_modified)
+    # Browsers keep the copy but revalidate it on every use
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    """A 304 response if the request's validators match, else None."""
+    # Pending flash messages only show up on a full render
+    if session.get("_flashes"):
+        return None
+
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif last_modified is not None and request.if_modified_since:
+        matched = _utc(last_modified).replace(microsecond=0) <= request.if_modified_since
+    else:
+        matched = False
+
+    if not matched:
+        return None
+    return _with_validators(make_response("", 304), etag, last_modified)
+
+
+def conditional(rv, etag, last_modified=None):
+    """Attach validators to a fully rendered response."""
+    return _with_validators(make_response(rv), etag, last_modified)
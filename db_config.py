@@ -0,0 +1,103 @@
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from extensions import db
+from db_routing import REPLICA_BIND
+
+# Engine configuration from the environment:
+#
+#   DATABASE_URL             sqlite:///... (default) or postgresql://...
+#   DATABASE_REPLICA_URL     optional read replica for @read_only routes
+#   REPLICA_LAG_SECONDS      keep a user's reads on the primary this long
+#                            after they write (default 5)
+#   DB_POOL_SIZE             PostgreSQL pool size per worker (default 5)
+#   DB_MAX_OVERFLOW          extra connections under bursts (default 10)
+#   DB_POOL_TIMEOUT          seconds to wait for a pooled connection (default 10)
+#   DB_POOL_RECYCLE          seconds before a connection is replaced (default 1800)
+#   DB_STATEMENT_TIMEOUT_MS  PostgreSQL statement_timeout (default 5000, 0 = off)
+#   SQLITE_JOURNAL_MODE      default WAL: readers no longer wait for writers
+#   SQLITE_BUSY_TIMEOUT_MS   wait this long for a write lock (default 5000)
+#   SQLITE_SYNCHRONOUS       default NORMAL (durable in WAL mode except on power loss)
+#   SQLITE_CACHE_SIZE_KB     page cache per connection (default 20000)
+
+
+def _int(environ, name, default):
+    return int(environ.get(name, default))
+
+
+def normalize_url(url):
+    # Heroku-style URLs use the scheme SQLAlchemy dropped in 1.4
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def database_url(default, environ=os.environ):
+    return normalize_url(environ.get("DATABASE_URL", default))
+
+
+def engine_options(url, environ=os.environ):
+    """SQLALCHEMY_ENGINE_OPTIONS for ``url``."""
+    backend = make_url(url).get_backend_name()
+    options = {"pool_pre_ping": True}
+
+    if backend == "postgresql":
+        options.update(
+            pool_size=_int(environ, "DB_POOL_SIZE", 5),
+            max_overflow=_int(environ, "DB_MAX_OVERFLOW", 10),
+            pool_timeout=_int(environ, "DB_POOL_TIMEOUT", 10),
+            pool_recycle=_int(environ, "DB_POOL_RECYCLE", 1800)
+        )
+        timeout = _int(environ, "DB_STATEMENT_TIMEOUT_MS", 5000)
+        if timeout:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+
+    return options
+
+
+def sqlite_pragmas(environ=os.environ):
+    return {
+        "journal_mode": environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        "busy_timeout": _int(environ, "SQLITE_BUSY_TIMEOUT_MS", 5000),
+        "synchronous": environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        # Negative cache_size is in KiB rather than pages
+        "cache_size": -_int(environ, "SQLITE_CACHE_SIZE_KB", 20000),
+    }
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run ``pragmas`` on every new connection of a SQLite engine."""
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def configure_database(app, default_url):
+    """Set the URI and engine options on ``app`` before db.init_app()."""
+    url = database_url(default_url)
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+    app.config.setdefault('SQLITE_PRAGMAS', sqlite_pragmas())
+
+    replica_url = os.environ.get("DATABASE_REPLICA_URL")
+    if replica_url:
+        replica_url = normalize_url(replica_url)
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: {"url": replica_url, **engine_options(replica_url)}
+        }
+    app.config['REPLICA_LAG_SECONDS'] = float(os.environ.get("REPLICA_LAG_SECONDS", 5))
+
+
+def init_engines(app):
+    """Hook SQLite pragmas onto the engines db.init_app() created."""
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                apply_sqlite_pragmas(engine, app.config['SQLITE_PRAGMAS'])
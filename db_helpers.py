@@ -0,0 +1,56 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+
+# Dialects that understand INSERT ... ON CONFLICT DO UPDATE
+UPSERT_DIALECTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def upsert_increment(model, key, deltas, returning=None, defaults=None):
+    """Add ``deltas`` to the counter columns of the row matching ``key``.
+
+    The row is created (with the deltas as initial values) when it does not
+    exist yet. ``key`` must cover a primary key or unique constraint.
+    With ``returning`` (a column name) the new value of that column is
+    returned. ``defaults`` are extra column values written on insert and
+    refreshed on update, but never added up.
+    """
+    defaults = defaults or {}
+    table = model.__table__
+    dialect = db.session.get_bind(mapper=model).dialect.name
+    insert = UPSERT_DIALECTS.get(dialect)
+
+    if insert is None:
+        # Portable fallback: UPDATE first, INSERT when nothing matched
+        result = db.session.execute(
+            table.update()
+            .where(*[table.c[col] == value for col, value in key.items()])
+            .values({
+                **defaults,
+                **{col: table.c[col] + value for col, value in deltas.items()}
+            })
+        )
+        if result.rowcount == 0:
+            db.session.execute(table.insert().values(**key, **deltas, **defaults))
+        if returning is None:
+            return None
+        return db.session.execute(
+            table.select()
+            .with_only_columns(table.c[returning])
+            .where(*[table.c[col] == value for col, value in key.items()])
+        ).scalar()
+
+    stmt = insert(table).values(**key, **deltas, **defaults)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={
+            **{col: stmt.excluded[col] for col in defaults},
+            **{col: table.c[col] + stmt.excluded[col] for col in deltas}
+        }
+    )
+    if returning is None:
+        db.session.execute(stmt)
+        return None
+    return db.session.execute(stmt.returning(table.c[returning])).scalar()
@@ -0,0 +1,66 @@
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+# Read/write routing between the primary database and a read replica.
+#
+# Routes marked @read_only send their queries to the "replica" bind
+# (SQLALCHEMY_BINDS). Everything else, and any flush or INSERT/UPDATE/DELETE,
+# goes to the primary. After a user writes, their reads stay on the primary
+# for REPLICA_LAG_SECONDS (tracked in the session cookie), so the page they
+# are redirected to shows their own change even if the replica lags behind.
+
+REPLICA_BIND = "replica"
+
+LAST_WRITE_KEY = "_db_last_write"
+
+
+def _replica_allowed():
+    if not has_request_context():
+        return False
+    if not g.get("read_only") or g.get("force_primary") or g.get("wrote"):
+        return False
+
+    last_write = session.get(LAST_WRITE_KEY)
+    window = current_app.config.get("REPLICA_LAG_SECONDS", 5)
+    return last_write is None or time.time() - last_write > window
+
+
+def _mark_write():
+    if has_request_context() and not g.get("wrote"):
+        g.wrote = True
+        session[LAST_WRITE_KEY] = time.time()
+
+
+class RoutingSession(Session):
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                _mark_write()
+            elif _replica_allowed():
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def mark_read_only():
+    g.read_only = True
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside this block (e.g. to fill shared caches)."""
+    previous = g.get("force_primary") if has_request_context() else None
+    if has_request_context():
+        g.force_primary = True
+    try:
+        yield
+    finally:
+        if has_request_context():
+            g.force_primary = previous
+
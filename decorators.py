@@ -1,6 +1,7 @@
 from functools import wraps
 from flask import abort
 from flask_login import current_user
+from db_routing import mark_read_only
 
 def admin_required(f):
     @wraps(f)
@@ -13,3 +14,23 @@ def admin_required(f):
 
         return f(*args, **kwargs)
     return decorated_function
+
+def super_admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            abort(403)
+
+        if current_user.role != "super_admin":
+            abort(403)
+
+        return f(*args, **kwargs)
+    return decorated_function
+
+def read_only(f):
+    # Queries in this view may be served by the read replica
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        mark_read_only()
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,124 @@
+import io
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from models import Order
+from invoices import invoice_store, invoice_snapshot, load_or_render_invoice
+from order_loading import apply_order_filters, load_items_by_order
+
+# Bulk invoice export: orders are read in keyset batches, PDFs are rendered
+# across a process pool and the ZIP is streamed out entry by entry, so memory
+# stays bounded by the batch size rather than the number of orders.
+
+EXPORT_BATCH_SIZE = 200
+
+# Render processes shared by all web exports; the CLI starts its own pool
+WEB_EXPORT_WORKERS = 2
+
+# spawn: never fork a process that is serving requests on other threads
+_SPAWN = multiprocessing.get_context("spawn")
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def iter_invoice_snapshots(date_from=None, date_to=None, restaurant_id=None,
+                           batch_size=EXPORT_BATCH_SIZE):
+    """Yield invoice snapshots for non-cancelled orders, oldest first."""
+    query = apply_order_filters(
+        Order.query.filter(Order.status != 'Cancelled'),
+        date_from=date_from,
+        date_to=date_to,
+        restaurant_id=restaurant_id
+    )
+
+    last_id = 0
+    while True:
+        orders = (
+            query
+            .filter(Order.id > last_id)
+            .order_by(Order.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not orders:
+            return
+
+        items_by_order = load_items_by_order([order.id for order in orders])
+        for order in orders:
+            yield invoice_snapshot(order, items_by_order[order.id])
+        last_id = orders[-1].id
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink that hands out what zipfile wrote since the last drain.
+
+    It is not seekable, so zipfile writes data descriptors after each entry
+    instead of seeking back to patch the local headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def shared_export_pool():
+    """Process pool for exports started from web requests, created on first use."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ProcessPoolExecutor(
+                max_workers=WEB_EXPORT_WORKERS, mp_context=_SPAWN
+            )
+        return _shared_pool
+
+
+def stream_invoice_zip(snapshots, pool=None, workers=None, batch_size=32):
+    """Yield the bytes of a ZIP holding one invoice PDF per snapshot.
+
+    Renders on ``pool`` when given, else on a pool of ``workers`` processes
+    that lives as long as the export.
+    """
+    if pool is not None:
+        yield from _zip_invoices(snapshots, pool, batch_size)
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_SPAWN) as own_pool:
+        yield from _zip_invoices(snapshots, own_pool, batch_size)
+
+
+def _zip_invoices(snapshots, pool, batch_size):
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+        for batch in _batched(snapshots, batch_size):
+            paths = [invoice_store.path_for(s)[0] for s in batch]
+            pdfs = pool.map(load_or_render_invoice, batch, paths)
+
+            for snapshot, pdf in zip(batch, pdfs):
+                archive.writestr(
+                    f"FoodHub_Invoice_Order_{snapshot['order_id']}.pdf", pdf
+                )
+                yield stream.drain()
+    yield stream.drain()
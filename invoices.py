@@ -0,0 +1,202 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from metrics import time_invoice_render
+
+# Bump when the PDF layout changes so cached files are re-rendered
+LAYOUT_VERSION = 1
+
+# ---------------- SNAPSHOT ---------------- #
+
+def invoice_snapshot(order, items):
+    """Everything the PDF shows, as plain data (safe to hand to workers)."""
+    return {
+        "order_id": order.id,
+        "payment_method": order.payment_method or "",
+        "address": order.address,
+        "items": [
+            [item.food_name, item.quantity, item.price]
+            for item in items
+        ]
+    }
+
+
+def invoice_digest(snapshot):
+    raw = json.dumps([LAYOUT_VERSION, snapshot], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:20]
+
+# ---------------- PDF LAYOUT ---------------- #
+
+def render_invoice_pdf(snapshot):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    y = height - 50
+
+    # Title
+    pdf.setFont("Helvetica-Bold", 18)
+    pdf.drawString(180, y, "FoodHub Invoice")
+    y -= 40
+
+    # Order info
+    pdf.setFont("Helvetica", 12)
+    pdf.drawString(50, y, f"Order ID: {snapshot['order_id']}")
+    y -= 20
+    pdf.drawString(50, y, f"Payment Method: {snapshot['payment_method'].upper()}")
+    y -= 20
+    pdf.drawString(50, y, f"Delivery Address: {snapshot['address']}")
+    y -= 30
+
+    # Table header
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(50, y, "Item")
+    pdf.drawString(260, y, "Qty")
+    pdf.drawString(310, y, "Price")
+    pdf.drawString(390, y, "Total")
+    y -= 20
+
+    pdf.setFont("Helvetica", 11)
+
+    subtotal = 0
+
+    for food_name, quantity, price in snapshot["items"]:
+        item_total = price * quantity
+        subtotal += item_total
+
+        pdf.drawString(50, y, food_name)
+        pdf.drawString(260, y, str(quantity))
+        pdf.drawString(310, y, f"₹{price}")
+        pdf.drawString(390, y, f"₹{item_total}")
+        y -= 20
+
+        if y < 100:
+            pdf.showPage()
+            y = height - 50
+
+    # Charges
+    gst = round(subtotal * 0.05, 2)
+    delivery_charge = 40 if subtotal < 500 else 0
+    final_amount = subtotal + gst + delivery_charge
+
+    y -= 20
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(300, y, "Subtotal:")
+    pdf.drawString(390, y, f"₹{subtotal}")
+    y -= 20
+    pdf.drawString(300, y, "GST (5%):")
+    pdf.drawString(390, y, f"₹{gst}")
+    y -= 20
+    pdf.drawString(300, y, "Delivery:")
+    pdf.drawString(390, y, f"₹{delivery_charge}")
+    y -= 20
+    pdf.drawString(300, y, "Final Amount:")
+    pdf.drawString(390, y, f"₹{final_amount}")
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+def load_or_render_invoice(snapshot, path):
+    """PDF bytes from the cache file at ``path``, rendering when missing.
+
+    Module-level (and free of app imports) so process pools can run it.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        with time_invoice_render():
+            return render_invoice_pdf(snapshot)
+
+# ---------------- ON-DISK CACHE ---------------- #
+
+class InvoiceStore:
+    """Content-addressed PDF cache rendered by a small background pool.
+
+    Files are named ``<order_id>-<digest>.pdf``; any change to what the
+    invoice shows produces a new digest, so stale files are never served.
+    """
+
+    def __init__(self, workers=2):
+        self.directory = None
+        self._workers = workers
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.setdefault(
+            'INVOICE_CACHE_DIR', os.path.join(app.instance_path, 'invoices')
+        )
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, snapshot):
+        digest = invoice_digest(snapshot)
+        name = f"{snapshot['order_id']}-{digest}.pdf"
+        return os.path.join(self.directory, name), digest
+
+    def submit(self, snapshot):
+        """Queue a render; returns a future resolving to ``(path, digest)``."""
+        path, digest = self.path_for(snapshot)
+
+        with self._lock:
+            future = self._pending.get(path)
+            if future is not None:
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers,
+                    thread_name_prefix="invoice"
+                )
+            future = self._executor.submit(
+                self._render, snapshot, path, digest
+            )
+            self._pending[path] = future
+
+        # Outside the lock: runs right here if the render already finished
+        future.add_done_callback(lambda f: self._forget(path))
+        return future
+
+    def ensure(self, snapshot):
+        """Path of the cached PDF, rendering it now if it is not on disk.
+
+        A miss renders in the calling thread rather than waiting behind the
+        background queue, which can be long after a burst of orders. A queued
+        render of the same file later finds it on disk and does nothing.
+        """
+        path, digest = self.path_for(snapshot)
+        if os.path.exists(path):
+            return path, digest
+        return self._render(snapshot, path, digest)
+
+    def _forget(self, path):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def _render(self, snapshot, path, digest):
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with time_invoice_render():
+                pdf = render_invoice_pdf(snapshot)
+            with open(tmp_path, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_path, path)
+
+            # Older renders of the same order are now stale
+            pattern = os.path.join(self.directory, f"{snapshot['order_id']}-*.pdf")
+            for stale in glob.glob(pattern):
+                if stale != path:
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+        return path, digest
+
+
+invoice_store = InvoiceStore()
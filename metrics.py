@@ -0,0 +1,180 @@
+import os
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+from request_metrics import request_metrics
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # optional: metrics become no-ops and /metrics says so
+    prometheus_client = None
+
+# Prometheus metrics for /metrics.
+#
+# With several worker processes (gunicorn, uwsgi) point PROMETHEUS_MULTIPROC_DIR
+# at an empty directory that every worker shares, before the app is imported;
+# each worker then writes its samples there and /metrics sums them all.
+#
+#   METRICS_TOKEN   when set, /metrics requires "Authorization: Bearer <token>";
+#                   when unset, only localhost and logged-in super admins get in
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RENDER_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+def _metric(kind, name, documentation, labelnames=(), **kwargs):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return getattr(prometheus_client, kind)(name, documentation, labelnames, **kwargs)
+
+# ---------------- HTTP ---------------- #
+
+REQUESTS = _metric(
+    "Counter", "foodhub_http_requests_total",
+    "HTTP requests by route and status.", ("method", "route", "status")
+)
+REQUEST_LATENCY = _metric(
+    "Histogram", "foodhub_http_request_duration_seconds",
+    "HTTP request latency by route.", ("method", "route"),
+    buckets=LATENCY_BUCKETS
+)
+IN_PROGRESS = _metric(
+    "Gauge", "foodhub_http_requests_in_progress",
+    "Requests currently being handled.", ("method", "route"),
+    multiprocess_mode="livesum"
+)
+
+# ---------------- DATABASE POOL ---------------- #
+
+DB_POOL_SIZE = _metric(
+    "Gauge", "foodhub_db_pool_size",
+    "Configured pool size per engine.", ("bind",),
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = _metric(
+    "Gauge", "foodhub_db_pool_checked_out",
+    "Connections currently checked out of the pool.", ("bind",),
+    multiprocess_mode="livesum"
+)
+DB_POOL_CONNECTIONS = _metric(
+    "Gauge", "foodhub_db_pool_connections",
+    "Open DB connections (idle or in use).", ("bind",),
+    multiprocess_mode="livesum"
+)
+
+# ---------------- BUSINESS EVENTS ---------------- #
+
+ORDERS_PLACED = _metric(
+    "Counter", "foodhub_orders_placed_total",
+    "Orders placed.", ("payment_method",)
+)
+ORDER_VALUE = _metric(
+    "Counter", "foodhub_order_value_rupees_total",
+    "Order totals placed, in rupees.", ("payment_method",)
+)
+ORDERS_CANCELLED = _metric(
+    "Counter", "foodhub_orders_cancelled_total",
+    "Orders cancelled, by who cancelled them.", ("by",)
+)
+REFUNDS = _metric(
+    "Counter", "foodhub_refunds_total",
+    "Refunds initiated for cancelled online payments."
+)
+REFUND_VALUE = _metric(
+    "Counter", "foodhub_refund_value_rupees_total",
+    "Refunded order totals, in rupees."
+)
+CART_ADDS = _metric(
+    "Counter", "foodhub_cart_adds_total",
+    "Items added to carts."
+)
+INVOICE_RENDERS = _metric(
+    "Counter", "foodhub_invoice_renders_total",
+    "Invoice PDFs rendered (cache misses)."
+)
+INVOICE_RENDER_TIME = _metric(
+    "Histogram", "foodhub_invoice_render_seconds",
+    "Time to render one invoice PDF.",
+    buckets=RENDER_BUCKETS
+)
+
+
+@contextmanager
+def time_invoice_render():
+    start = time.perf_counter()
+    yield
+    INVOICE_RENDER_TIME.observe(time.perf_counter() - start)
+    INVOICE_RENDERS.inc()
+
+# ---------------- EXPORT ---------------- #
+
+def render_metrics():
+    """``(body, content_type)`` in the Prometheus text format."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Call from the server's worker-exit hook so dead workers' gauges drop out."""
+    if prometheus_client is not None and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+# ---------------- HOOKS ---------------- #
+
+# Request timing and route labels come from request_metrics, which already
+# times every request; these only turn its callbacks into samples
+
+def _request_started(method, route):
+    IN_PROGRESS.labels(method, route).inc()
+
+
+def _request_finished(method, route, status, elapsed):
+    IN_PROGRESS.labels(method, route).dec()
+    REQUEST_LATENCY.labels(method, route).observe(elapsed)
+    REQUESTS.labels(method, route, str(status)).inc()
+
+
+def _watch_pool(bind, engine):
+    pool = engine.pool
+    if hasattr(pool, "size"):
+        DB_POOL_SIZE.labels(bind).set(pool.size())
+
+    checked_out = DB_POOL_CHECKED_OUT.labels(bind)
+    connections = DB_POOL_CONNECTIONS.labels(bind)
+    event.listen(engine, "checkout", lambda *args: checked_out.inc())
+    event.listen(engine, "checkin", lambda *args: checked_out.dec())
+    event.listen(engine, "connect", lambda *args: connections.inc())
+    event.listen(engine, "close", lambda *args: connections.dec())
+    event.listen(engine, "detach", lambda *args: connections.dec())
+
+
+def init_metrics(engines):
+    """Report requests (via request_metrics) and pool listeners (``engines``: bind → engine)."""
+    if prometheus_client is None:
+        return
+
+    request_metrics.add_listener(_request_started, _request_finished)
+    for bind, engine in engines.items():
+        _watch_pool(bind or "primary", engine)
@@ -0,0 +1,248 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.datastructures import MultiDict
+from extensions import db
+from models import (User, Food, Cart, Order, OrderItem, Review,
+                    OrderStatusHistory, SchemaMigration)
+from catalog import build_menu_query, menu_filters_from_args
+from order_loading import apply_order_filters
+from ratings import rebuild_ratings
+from rollups import rebuild_rollups
+from search_index import rebuild_search_index
+
+# Versioned schema migrations, run with: flask --app app migrate
+#
+# New tables come from db.create_all(); everything else (columns added after
+# the fact, data fixes, indexes) is a numbered step below. Applied versions are
+# stored in schema_migration, and every step checks before it changes anything,
+# so databases patched by hand with the old update_*.py scripts upgrade cleanly.
+
+Migration = namedtuple("Migration", "version name upgrade")
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def register(upgrade):
+        MIGRATIONS.append(Migration(version, name, upgrade))
+        return upgrade
+    return register
+
+# ---------------- HELPERS ---------------- #
+
+def _quote(name):
+    return db.session.get_bind().dialect.identifier_preparer.quote(name)
+
+
+def _columns(table):
+    return {
+        column["name"]
+        for column in inspect(db.session.connection()).get_columns(table)
+    }
+
+
+def _add_column(table, column, ddl):
+    if column not in _columns(table):
+        db.session.execute(text(
+            f"ALTER TABLE {_quote(table)} ADD COLUMN {column} {ddl}"
+        ))
+
+
+def _create_unique_index(name, table, *columns):
+    db.session.execute(text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {name} "
+        f"ON {_quote(table)} ({', '.join(columns)})"
+    ))
+
+
+def _create_model_indexes(*names):
+    """Create indexes declared on the models (index=True / db.Index)."""
+    indexes = {
+        index.name: index
+        for table in db.metadata.tables.values()
+        for index in table.indexes
+    }
+    for name in names:
+        indexes[name].create(db.session.connection(), checkfirst=True)
+
+# ---------------- MIGRATIONS ---------------- #
+
+@migration(1, "order address and phone")
+def add_order_contact():
+    _add_column("order", "address", "TEXT")
+    _add_column("order", "phone", "VARCHAR(15)")
+
+
+@migration(2, "food veg and bestseller flags")
+def add_food_flags():
+    _add_column("food", "is_veg", "BOOLEAN DEFAULT TRUE")
+    _add_column("food", "is_bestseller", "BOOLEAN DEFAULT FALSE")
+
+
+@migration(3, "order item food_id")
+def add_order_item_food():
+    _add_column("order_item", "food_id", "INTEGER")
+
+
+@migration(4, "user roles")
+def add_user_roles():
+    _add_column("user", "role", "VARCHAR(20) DEFAULT 'customer'")
+    _add_column("user", "restaurant_id", "INTEGER")
+
+    # Databases from before roles flagged admins with is_admin
+    if "is_admin" in _columns("user"):
+        db.session.execute(text(
+            f"UPDATE {_quote('user')} SET role = 'super_admin' WHERE is_admin = 1"
+        ))
+
+
+@migration(5, "unique cart line per dish")
+def dedupe_cart_lines():
+    # Merge duplicate lines into the oldest one before adding the constraint
+    db.session.execute(text("""
+        UPDATE cart
+        SET quantity = (
+            SELECT SUM(c2.quantity) FROM cart c2
+            WHERE c2.user_id = cart.user_id AND c2.food_id = cart.food_id
+        )
+        WHERE id IN (SELECT MIN(id) FROM cart GROUP BY user_id, food_id)
+    """))
+    db.session.execute(text("""
+        DELETE FROM cart
+        WHERE id NOT IN (SELECT MIN(id) FROM cart GROUP BY user_id, food_id)
+    """))
+    _create_unique_index("uq_cart_user_food", "cart", "user_id", "food_id")
+
+
+@migration(6, "checkout idempotency key")
+def add_order_idempotency():
+    _add_column("order", "idempotency_key", "VARCHAR(64)")
+    _create_unique_index(
+        "uq_order_idempotency", "order", "user_id", "idempotency_key"
+    )
+
+
+@migration(7, "food rating stats")
+def backfill_food_ratings():
+    rebuild_ratings()
+
+
+@migration(8, "menu search index")
+def backfill_search_index():
+    rebuild_search_index()
+
+
+@migration(9, "dashboard rollups")
+def backfill_rollups():
+    rebuild_rollups()
+
+
+@migration(10, "foreign key and route indexes")
+def add_route_indexes():
+    _create_model_indexes(
+        "ix_cart_food_id",
+        "ix_order_item_order_id",
+        "ix_order_item_food_id",
+        "ix_review_food_id",
+        "ix_review_user_id_food_id",
+        "ix_order_status_history_order_id_changed_at",
+        "ix_order_user_id_id",
+        "ix_order_status_id",
+        "ix_order_created_at",
+        "ix_food_restaurant_id",
+        "ix_daily_food_sales_restaurant_id",
+    )
+
+
+@migration(11, "review sort index")
+def add_review_sort_index():
+    _create_model_indexes("ix_review_food_id_rating_id")
+
+# ---------------- RUNNER ---------------- #
+
+def pending_migrations():
+    applied = {
+        version for (version,) in
+        db.session.query(SchemaMigration.version).all()
+    }
+    return [m for m in sorted(MIGRATIONS) if m.version not in applied]
+
+
+def run_migrations(echo=print):
+    """Create missing tables, then apply pending steps in version order."""
+    db.create_all()
+
+    pending = pending_migrations()
+    for step in pending:
+        step.upgrade()
+        db.session.add(SchemaMigration(version=step.version, name=step.name))
+        db.session.commit()
+        echo(f"✅ {step.version:03d} {step.name}")
+    return pending
+
+# ---------------- QUERY PLANS ---------------- #
+
+def _sample_ids():
+    first = lambda column: db.session.query(column).order_by(column).limit(1).scalar() or 1
+    return first(User.id), first(Food.id), first(Order.id), first(Food.restaurant_id)
+
+
+def route_queries():
+    """The hot queries behind the main routes, with sample ids bound."""
+    user_id, food_id, order_id, restaurant_id = _sample_ids()
+    week_ago = datetime.utcnow() - timedelta(days=7)
+
+    return [
+        ("/menu", build_menu_query(menu_filters_from_args(MultiDict()))),
+        ("cart lines", Cart.query.filter_by(user_id=user_id)),
+        ("/orders page",
+         Order.query.filter_by(user_id=user_id).order_by(Order.id.desc()).limit(11)),
+        ("order items",
+         OrderItem.query.filter(OrderItem.order_id.in_([order_id])).order_by(OrderItem.id)),
+        ("status timeline",
+         OrderStatusHistory.query.filter(OrderStatusHistory.order_id.in_([order_id]))
+         .order_by(OrderStatusHistory.changed_at, OrderStatusHistory.id)),
+        ("user reviews",
+         db.session.query(Review.food_id, Review.rating).filter(Review.user_id == user_id)),
+        ("food reviews", Review.query.filter_by(food_id=food_id)),
+        ("restaurant menu", Food.query.filter_by(restaurant_id=restaurant_id)),
+        ("/admin/orders?status",
+         apply_order_filters(Order.query, status='Pending')
+         .order_by(Order.id.desc()).limit(21)),
+        ("/admin/orders (restaurant)",
+         apply_order_filters(Order.query, restaurant_id=restaurant_id)
+         .order_by(Order.id.desc()).limit(21)),
+        ("orders since date",
+         apply_order_filters(Order.query, date_from=week_ago).order_by(Order.id)),
+    ]
+
+
+def explain(query):
+    """Query plan lines for ``query`` (SQLite and PostgreSQL)."""
+    dialect = db.session.get_bind().dialect
+    sql = str(query.statement.compile(
+        dialect=dialect, compile_kwargs={"literal_binds": True}
+    ))
+
+    if dialect.name == "sqlite":
+        rows = db.session.execute(text("EXPLAIN QUERY PLAN " + sql)).all()
+        return [row[-1] for row in rows]
+    if dialect.name == "postgresql":
+        rows = db.session.execute(text("EXPLAIN " + sql)).all()
+        return [row[0] for row in rows]
+    return [f"(no plan output for {dialect.name})"]
+
+
+def route_query_plans():
+    plans = {}
+    for name, query in route_queries():
+        try:
+            plans[name] = explain(query)
+        except SQLAlchemyError as e:
+            # Columns the query needs may not exist before migrating
+            db.session.rollback()
+            reason = str(getattr(e, "orig", e)).splitlines()[0]
+            plans[name] = [f"(unavailable: {reason})"]
+    return plans
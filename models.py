@@ -23,19 +23,31 @@ class Food(db.Model):
     is_veg = db.Column(db.Boolean, default=True)
     is_bestseller = db.Column(db.Boolean, default=False)
 
-    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'))
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), index=True)
 
 class Cart(db.Model):
     __tablename__ = "cart"
+    __table_args__ = (
+        # One line per dish: lets cart writes use INSERT ... ON CONFLICT
+        db.UniqueConstraint('user_id', 'food_id', name='uq_cart_user_food'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    food_id = db.Column(db.Integer, db.ForeignKey('food.id'))
+    food_id = db.Column(db.Integer, db.ForeignKey('food.id'), index=True)
     quantity = db.Column(db.Integer, default=1)
 
     food = db.relationship("Food")
 
 class Order(db.Model):
+    __table_args__ = (
+        # A checkout retried with the same key maps to the same order
+        db.UniqueConstraint('user_id', 'idempotency_key', name='uq_order_idempotency'),
+        # Keyset pages: a user's orders / orders in a status, newest first
+        db.Index('ix_order_user_id_id', 'user_id', 'id'),
+        db.Index('ix_order_status_id', 'status', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     total = db.Column(db.Float)
@@ -45,26 +57,35 @@ class Order(db.Model):
     payment_status = db.Column(db.String(20), default="Paid")
     refund_status = db.Column(db.String(20), default="Not Applicable")
     
-    created_at = db.Column(db.DateTime, default=db.func.now())
+    created_at = db.Column(db.DateTime, default=db.func.now(), index=True)
 
     address = db.Column(db.Text)
     phone = db.Column(db.String(15))
 
+    idempotency_key = db.Column(db.String(64))
+
     user = db.relationship('User', backref='orders')
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'))
-    food_id = db.Column(db.Integer, db.ForeignKey('food.id'))
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), index=True)
+    food_id = db.Column(db.Integer, db.ForeignKey('food.id'), index=True)
 
     food_name = db.Column(db.String(100))
     quantity = db.Column(db.Integer)
     price = db.Column(db.Float)
 
 class Review(db.Model):
+    __table_args__ = (
+        # "Already reviewed?" checks and the user's review map on /orders
+        db.Index('ix_review_user_id_food_id', 'user_id', 'food_id'),
+        # Highest / lowest rated first on /food/<id>
+        db.Index('ix_review_food_id_rating_id', 'food_id', 'rating', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    food_id = db.Column(db.Integer, db.ForeignKey('food.id'))
+    food_id = db.Column(db.Integer, db.ForeignKey('food.id'), index=True)
     rating = db.Column(db.Integer)  # 1–5
     comment = db.Column(db.Text)
 
@@ -85,6 +106,11 @@ class Coupon(db.Model):
     discount = db.Column(db.Integer, nullable=False)  # flat discount amount
 
 class OrderStatusHistory(db.Model):
+    __table_args__ = (
+        # Timelines are read per order, oldest change first
+        db.Index('ix_order_status_history_order_id_changed_at', 'order_id', 'changed_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'))
     status = db.Column(db.String(20))
@@ -92,11 +118,58 @@ class OrderStatusHistory(db.Model):
 
     order = db.relationship('Order', backref='status_history')
 
-
-
-
-
-
-
-
-
+class DailySales(db.Model):
+    # Dashboard rollup: all restaurants, one row per day
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0, nullable=False)
+
+class DailyRestaurantSales(db.Model):
+    # Dashboard rollup: one row per restaurant per day
+    day = db.Column(db.Date, primary_key=True)
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), primary_key=True)
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0, nullable=False)
+
+class DailyFoodSales(db.Model):
+    # Dashboard rollup: quantity sold per dish per day
+    day = db.Column(db.Date, primary_key=True)
+    food_id = db.Column(db.Integer, db.ForeignKey('food.id'), primary_key=True)
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), index=True)
+    food_name = db.Column(db.String(100))
+    quantity = db.Column(db.Integer, default=0, nullable=False)
+
+class FoodRating(db.Model):
+    # Denormalized review stats, kept in sync by add_review
+    food_id = db.Column(db.Integer, db.ForeignKey('food.id'), primary_key=True)
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)
+    rating_count = db.Column(db.Integer, default=0, nullable=False)
+
+    # Star histogram
+    stars_1 = db.Column(db.Integer, default=0, nullable=False)
+    stars_2 = db.Column(db.Integer, default=0, nullable=False)
+    stars_3 = db.Column(db.Integer, default=0, nullable=False)
+    stars_4 = db.Column(db.Integer, default=0, nullable=False)
+    stars_5 = db.Column(db.Integer, default=0, nullable=False)
+
+    @property
+    def average(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
+
+    @property
+    def histogram(self):
+        return {
+            5: self.stars_5,
+            4: self.stars_4,
+            3: self.stars_3,
+            2: self.stars_2,
+            1: self.stars_1,
+        }
+
+class SchemaMigration(db.Model):
+    # Versions applied by migrations.py
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100))
+    applied_at = db.Column(db.DateTime, default=db.func.now())
@@ -0,0 +1,90 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+
+# Orders in these states never change again, so nobody needs to watch them
+FINAL_STATUSES = ("Delivered", "Cancelled")
+
+
+class OrderStatusHub:
+    """In-process publish/subscribe hub for order status changes.
+
+    Each open stream owns a bounded queue; a subscriber too slow to drain it
+    misses events and resynchronises from the snapshot sent on reconnect.
+    Subscribers only see events published by the same worker process; the
+    stream's periodic DB refresh picks up the rest.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        events = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers[user_id].add(events)
+        return events
+
+    def unsubscribe(self, user_id, events):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(events)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, order_id, status):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, ()))
+
+        event = {"order_id": order_id, "status": status}
+        for events in targets:
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+order_status_hub = OrderStatusHub()
+
+
+def format_event(data, event="status"):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_events(events, snapshot, refresh=None, heartbeat=15, max_seconds=300):
+    """Server-Sent Events body: the snapshot first, then live changes.
+
+    Sends a comment line every ``heartbeat`` seconds so proxies keep the
+    connection open. ``refresh`` (optional) returns current ``(order_id,
+    status)`` pairs and is called on every heartbeat, so changes made by
+    other worker processes are sent too. Ends after ``max_seconds``;
+    EventSource reconnects.
+    """
+    yield "retry: 5000\n\n"
+    sent = {}
+    for order_id, status in snapshot:
+        sent[order_id] = status
+        yield format_event({"order_id": order_id, "status": status})
+
+    deadline = time.monotonic() + max_seconds
+    while time.monotonic() < deadline:
+        try:
+            event = events.get(timeout=heartbeat)
+        except queue.Empty:
+            if refresh is not None:
+                for order_id, status in refresh():
+                    if sent.get(order_id) != status:
+                        sent[order_id] = status
+                        yield format_event({"order_id": order_id, "status": status})
+            yield ": keep-alive\n\n"
+            continue
+        sent[event["order_id"]] = event["status"]
+        yield format_event(event)
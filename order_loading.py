@@ -0,0 +1,99 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy.orm.attributes import set_committed_value
+from extensions import db
+from models import Food, Order, OrderItem, OrderStatusHistory
+
+# Batched loaders for order pages: a fixed number of queries per page,
+# however many orders, items or status changes the page holds.
+
+
+def paginate_orders(query, before=None, per_page=10):
+    """Newest-first keyset page of ``query``.
+
+    Returns ``(orders, next_before)``; pass ``next_before`` back as
+    ``before`` to fetch the following page (None on the last page).
+    """
+    if before:
+        query = query.filter(Order.id < before)
+
+    orders = query.order_by(Order.id.desc()).limit(per_page + 1).all()
+
+    if len(orders) > per_page:
+        orders = orders[:per_page]
+        return orders, orders[-1].id
+    return orders, None
+
+
+def load_items_by_order(order_ids):
+    items = defaultdict(list)
+    if not order_ids:
+        return items
+
+    rows = (
+        OrderItem.query
+        .filter(OrderItem.order_id.in_(order_ids))
+        .order_by(OrderItem.id)
+        .all()
+    )
+
+    # Older rows may lack the food_name snapshot; resolve those in one query
+    missing = {r.food_id for r in rows if not r.food_name and r.food_id}
+    names = {}
+    if missing:
+        names = dict(
+            db.session.query(Food.id, Food.name)
+            .filter(Food.id.in_(missing))
+            .all()
+        )
+
+    for row in rows:
+        if not row.food_name:
+            # Display-only: set without marking the row dirty
+            set_committed_value(row, "food_name", names.get(row.food_id, ""))
+        items[row.order_id].append(row)
+    return items
+
+
+def load_history_by_order(order_ids):
+    history = defaultdict(list)
+    if not order_ids:
+        return history
+
+    rows = (
+        OrderStatusHistory.query
+        .filter(OrderStatusHistory.order_id.in_(order_ids))
+        .order_by(OrderStatusHistory.changed_at.asc(), OrderStatusHistory.id)
+        .all()
+    )
+    for row in rows:
+        history[row.order_id].append(row)
+    return history
+
+
+def apply_order_filters(query, status=None, payment_method=None,
+                        date_from=None, date_to=None, restaurant_id=None):
+    """Server-side filters for the admin order console.
+
+    ``date_to`` is inclusive. ``restaurant_id`` keeps orders with at least one
+    item from that restaurant (EXISTS, so no JOIN + DISTINCT over all items).
+    """
+    if status:
+        query = query.filter(Order.status == status)
+    if payment_method:
+        query = query.filter(Order.payment_method == payment_method)
+    if date_from:
+        query = query.filter(Order.created_at >= date_from)
+    if date_to:
+        query = query.filter(Order.created_at < date_to + timedelta(days=1))
+    if restaurant_id is not None:
+        query = query.filter(
+            db.session.query(OrderItem.id)
+            .join(Food, Food.id == OrderItem.food_id)
+            .filter(
+                OrderItem.order_id == Order.id,
+                Food.restaurant_id == restaurant_id
+            )
+            .exists()
+        )
+    return query
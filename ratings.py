@@ -0,0 +1,101 @@
+from sqlalchemy import case, func, tuple_
+from sqlalchemy.orm import joinedload
+from extensions import db
+from models import FoodRating, Review
+from db_helpers import upsert_increment
+from catalog import encode_cursor, decode_cursor
+
+STAR_COLUMNS = {star: f"stars_{star}" for star in range(1, 6)}
+
+REVIEWS_PER_PAGE = 10
+
+# Keyset columns and direction per sort; each is an index range scan on
+# ix_review_food_id (newest) or ix_review_food_id_rating_id
+REVIEW_SORTS = {
+    "newest": ([Review.id], True),
+    "highest": ([Review.rating, Review.id], True),
+    "lowest": ([Review.rating, Review.id], False),
+}
+
+
+def load_ratings(food_ids):
+    """Return ``{food_id: FoodRating}`` for the given dishes in one query."""
+    food_ids = set(food_ids)
+    if not food_ids:
+        return {}
+
+    rows = FoodRating.query.filter(FoodRating.food_id.in_(food_ids)).all()
+    return {row.food_id: row for row in rows}
+
+
+def load_review_page(food_id, sort="newest", cursor=None, per_page=REVIEWS_PER_PAGE):
+    """One page of a dish's reviews with their users, plus the next cursor.
+
+    Cost depends on ``per_page``, not on how many reviews the dish has.
+    Raises ValueError for a cursor from another sort order.
+    """
+    if sort not in REVIEW_SORTS:
+        sort = "newest"
+    keys, descending = REVIEW_SORTS[sort]
+
+    query = (
+        Review.query
+        .options(joinedload(Review.user))
+        .filter(Review.food_id == food_id)
+    )
+    if cursor:
+        last = tuple_(*decode_cursor(cursor, sort, size=len(keys)))
+        query = query.filter(
+            tuple_(*keys) < last if descending else tuple_(*keys) > last
+        )
+
+    reviews = (
+        query
+        .order_by(*[k.desc() if descending else k.asc() for k in keys])
+        .limit(per_page + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(reviews) > per_page:
+        reviews = reviews[:per_page]
+        last_review = reviews[-1]
+        next_cursor = encode_cursor(sort, [getattr(last_review, k.key) for k in keys])
+    return reviews, next_cursor
+
+
+def record_rating(food_id, rating):
+    # Called in the same transaction as the Review insert
+    upsert_increment(
+        FoodRating,
+        {"food_id": food_id},
+        {"rating_sum": rating, "rating_count": 1, STAR_COLUMNS[rating]: 1}
+    )
+
+
+def rebuild_ratings():
+    """Recompute every FoodRating row from the review table."""
+    star_counts = [
+        func.sum(case((Review.rating == star, 1), else_=0)).label(column)
+        for star, column in STAR_COLUMNS.items()
+    ]
+    rows = (
+        db.session.query(
+            Review.food_id,
+            func.sum(Review.rating).label("rating_sum"),
+            func.count(Review.id).label("rating_count"),
+            *star_counts
+        )
+        .filter(Review.food_id.isnot(None))
+        .group_by(Review.food_id)
+        .all()
+    )
+
+    FoodRating.query.delete()
+    if rows:
+        db.session.execute(
+            FoodRating.__table__.insert(),
+            [row._asdict() for row in rows]
+        )
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,224 @@
+import threading
+import time
+from collections import namedtuple
+from extensions import db
+from models import Food, Order, OrderItem
+
+try:
+    import numpy as np
+except ImportError:  # optional: callers fall back to the SQL recommendations
+    np = None
+
+# Item-to-item recommendations from order history.
+#
+# The model is built off the request path: every pair of dishes ordered
+# together scores count(a, b) / sqrt(orders(a) * orders(b)) (cosine), and only
+# the best ``neighbors`` per dish are kept in CSR arrays. A user's top-k is the
+# recency-weighted sum of the neighbour lists of their recent dishes.
+
+ItemModel = namedtuple(
+    "ItemModel",
+    "food_ids indptr neighbors scores popular user_items built_at"
+)
+
+# Baskets larger than this are truncated; pair counts grow quadratically
+MAX_BASKET = 50
+
+
+def _exclusive_cumsum(values):
+    return np.cumsum(values) - values
+
+
+def _top_k_per_row(rows, cols, scores, n, k):
+    """Keep the ``k`` best-scoring columns of every row, as CSR arrays."""
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+
+    row_starts = np.searchsorted(rows, np.arange(n))
+    rank = np.arange(len(rows)) - row_starts[rows]
+    keep = rank < k
+    rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols.astype(np.int32), scores.astype(np.float32)
+
+
+def build_item_model(order_ids, user_ids, food_ids, valid_food_ids,
+                     neighbors=20, recent_items=20):
+    """Build an ItemModel from parallel arrays of order lines.
+
+    Lines must be sorted by order id (oldest first). Dishes not in
+    ``valid_food_ids`` (deleted ones) are ignored.
+    """
+    catalog = np.array(sorted(valid_food_ids), dtype=np.int64)
+    n = len(catalog)
+
+    order_ids = np.asarray(order_ids, dtype=np.int64)
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    food_ids = np.asarray(food_ids, dtype=np.int64)
+
+    # Map food ids to dense indexes, dropping unknown dishes
+    pos = np.minimum(np.searchsorted(catalog, food_ids), max(n - 1, 0))
+    known = catalog[pos] == food_ids if n else np.zeros(len(food_ids), dtype=bool)
+    order_ids, user_ids, items = order_ids[known], user_ids[known], pos[known]
+
+    # One entry per (order, dish)
+    _, first = np.unique(order_ids * max(n, 1) + items, return_index=True)
+    first.sort()
+    order_ids, user_ids, items = order_ids[first], user_ids[first], items[first]
+
+    popularity = np.bincount(items, minlength=n).astype(np.float64)
+
+    # Baskets, truncated to MAX_BASKET dishes
+    starts = np.flatnonzero(np.r_[True, order_ids[1:] != order_ids[:-1]])[:len(order_ids)]
+    lengths = np.diff(np.r_[starts, len(order_ids)])
+    basket_items = items[
+        np.arange(len(items)) - np.repeat(starts, lengths) < MAX_BASKET
+    ]
+    lengths = np.minimum(lengths, MAX_BASKET)
+
+    # Every ordered pair inside each basket
+    item_len = np.repeat(lengths, lengths)
+    item_start = np.repeat(_exclusive_cumsum(lengths), lengths)
+    left = np.repeat(basket_items, item_len)
+    offsets = np.arange(len(left)) - np.repeat(_exclusive_cumsum(item_len), item_len)
+    right = basket_items[np.repeat(item_start, item_len) + offsets]
+    distinct = left != right
+    left, right = left[distinct], right[distinct]
+
+    pairs, counts = np.unique(left * n + right, return_counts=True)
+    rows, cols = pairs // max(n, 1), pairs % max(n, 1)
+    scores = counts / np.sqrt(popularity[rows] * popularity[cols])
+    indptr, neighbor_idx, neighbor_scores = _top_k_per_row(
+        rows, cols, scores, n, neighbors
+    )
+
+    # Each user's most recent distinct dishes, newest first
+    user_items = {}
+    for user_id, item in zip(user_ids[::-1].tolist(), items[::-1].tolist()):
+        recent = user_items.setdefault(user_id, [])
+        if len(recent) < recent_items and item not in recent:
+            recent.append(item)
+
+    return ItemModel(
+        food_ids=catalog,
+        indptr=indptr,
+        neighbors=neighbor_idx,
+        scores=neighbor_scores,
+        popular=np.argsort(-popularity, kind="stable")[:100],
+        user_items={u: np.array(i, dtype=np.int64) for u, i in user_items.items()},
+        built_at=time.monotonic()
+    )
+
+
+def top_k(model, recent, k):
+    """Top ``k`` dense indexes for a user whose recent dishes are ``recent``."""
+    if recent is None or len(recent) == 0:
+        return model.popular[:k]
+
+    # Gather the neighbour lists of all recent dishes; newer dishes weigh more
+    starts = model.indptr[recent]
+    lengths = model.indptr[recent + 1] - starts
+    slots = np.arange(lengths.sum()) + np.repeat(starts - _exclusive_cumsum(lengths), lengths)
+    candidates = model.neighbors[slots]
+    weights = np.repeat(1.0 / (1.0 + 0.2 * np.arange(len(recent))), lengths)
+
+    totals = np.bincount(
+        candidates, weights=model.scores[slots] * weights,
+        minlength=len(model.food_ids)
+    )
+    totals[recent] = 0
+    scored = np.flatnonzero(totals > 0)
+    picked = scored[np.argsort(-totals[scored], kind="stable")][:k]
+
+    if len(picked) < k:
+        # Top up with popular dishes the user has not had recently
+        extra = model.popular[~np.isin(model.popular, np.r_[recent, picked])]
+        picked = np.r_[picked, extra[:k - len(picked)]]
+    return picked
+
+
+class ItemRecommender:
+    """Holds the current ItemModel and refreshes it in the background."""
+
+    def __init__(self, refresh_seconds=600, neighbors=20, recent_items=20):
+        self.refresh_seconds = refresh_seconds
+        self.neighbors = neighbors
+        self.recent_items = recent_items
+        self.model = None
+        self._app = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return np is not None
+
+    def init_app(self, app):
+        self._app = app
+
+    def refresh(self):
+        """Rebuild the model from order history (needs an app context)."""
+        rows = (
+            db.session.query(Order.id, Order.user_id, OrderItem.food_id)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .filter(Order.status != 'Cancelled', OrderItem.food_id.isnot(None))
+            .order_by(Order.id)
+            .all()
+        )
+        valid = [food_id for (food_id,) in db.session.query(Food.id).all()]
+
+        order_ids, user_ids, food_ids = zip(*rows) if rows else ((), (), ())
+        self.model = build_item_model(
+            order_ids, user_ids, food_ids, valid,
+            neighbors=self.neighbors, recent_items=self.recent_items
+        )
+        return self.model
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing or self._app is None:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                with self._app.app_context():
+                    self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="recommender-refresh", daemon=True).start()
+
+    def recommend(self, user_id, k=3):
+        """Food ids for ``user_id``, or None while no model is ready."""
+        if not self.available:
+            return None
+
+        model = self.model
+        if model is None or time.monotonic() - model.built_at > self.refresh_seconds:
+            self._refresh_in_background()
+        if model is None:
+            return None
+
+        picked = top_k(model, model.user_items.get(user_id), k)
+        return model.food_ids[picked].tolist()
+
+    def record_order(self, user_id, food_ids):
+        """Fold a new order into the user's recent dishes until the next refresh."""
+        model = self.model
+        if model is None:
+            return
+
+        pos = np.searchsorted(model.food_ids, food_ids)
+        pos = [
+            p for p, food_id in zip(pos.tolist(), food_ids)
+            if p < len(model.food_ids) and model.food_ids[p] == food_id
+        ]
+        previous = model.user_items.get(user_id, np.zeros(0, dtype=np.int64))
+        merged = list(dict.fromkeys(pos + previous.tolist()))[:self.recent_items]
+        model.user_items[user_id] = np.array(merged, dtype=np.int64)
+
+
+recommender = ItemRecommender()
@@ -0,0 +1,259 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from flask import g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Per-request SQL instrumentation: query count, DB time and the slowest
+# statement, exposed as Server-Timing / X-Query-Count headers, a slow-request
+# log (one JSON object per line) and per-endpoint totals for /admin/perf.
+#
+#   SLOW_REQUEST_MS   requests at least this slow are logged (default 500)
+#   SLOW_REQUEST_LOG  file for the slow log (default: stderr)
+
+slow_log = logging.getLogger("foodhub.slow_requests")
+
+# Long statements are cut down in the slow log and on /admin/perf
+MAX_SQL_LENGTH = 500
+
+
+def route_label():
+    """``request.url_rule`` as a label, e.g. ``/food/<int:food_id>``."""
+    # 404s have no rule; group them so random paths can't grow the table
+    return request.url_rule.rule if request.url_rule else "<unmatched>"
+
+
+class RequestStats:
+    __slots__ = ("start", "route", "queries", "db_time", "slowest_time", "slowest_sql")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.route = route_label()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql = None
+
+
+class EndpointStats:
+    """Running totals for one ``METHOD /rule`` plus recent latencies."""
+
+    def __init__(self, recent):
+        self.count = 0
+        self.errors = 0
+        self.slow = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.db_time = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.slowest_time = 0.0
+        self.slowest_sql = None
+        self.recent = deque(maxlen=recent)
+
+    def add(self, stats, elapsed, status, slow):
+        self.count += 1
+        self.errors += status >= 500
+        self.slow += slow
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.db_time += stats.db_time
+        self.queries += stats.queries
+        self.max_queries = max(self.max_queries, stats.queries)
+        if stats.slowest_time > self.slowest_time:
+            self.slowest_time = stats.slowest_time
+            self.slowest_sql = stats.slowest_sql
+        self.recent.append(elapsed)
+
+    def as_dict(self, key):
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+        return {
+            "endpoint": key,
+            "count": self.count,
+            "errors": self.errors,
+            "slow": self.slow,
+            "mean_ms": round(self.total_time / self.count * 1000, 2),
+            "p95_ms": round(p95 * 1000, 2),
+            "max_ms": round(self.max_time * 1000, 2),
+            "total_s": round(self.total_time, 2),
+            "db_mean_ms": round(self.db_time / self.count * 1000, 2),
+            "queries_mean": round(self.queries / self.count, 1),
+            "queries_max": self.max_queries,
+            "slowest_query_ms": round(self.slowest_time * 1000, 2),
+            "slowest_query": self.slowest_sql
+        }
+
+# ---------------- SQL EVENTS ---------------- #
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "_request_stats" in g:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts or not has_request_context():
+        return
+    stats = g.get("_request_stats")
+    if stats is None:
+        return
+
+    elapsed = time.perf_counter() - starts.pop()
+    stats.queries += 1
+    stats.db_time += elapsed
+    if elapsed > stats.slowest_time:
+        stats.slowest_time = elapsed
+        stats.slowest_sql = statement
+
+
+def _on_error(context):
+    # A failed statement never reaches after_cursor_execute
+    starts = context.connection.info.get("query_start") if context.connection else None
+    if starts:
+        starts.pop()
+
+
+_listening = False
+
+
+def _listen():
+    # Engine-level, so the primary and the replica are both counted
+    global _listening
+    if not _listening:
+        event.listen(Engine, "before_cursor_execute", _before_execute)
+        event.listen(Engine, "after_cursor_execute", _after_execute)
+        event.listen(Engine, "handle_error", _on_error)
+        _listening = True
+
+
+def _short_sql(statement):
+    statement = " ".join((statement or "").split())
+    if len(statement) > MAX_SQL_LENGTH:
+        statement = statement[:MAX_SQL_LENGTH] + "…"
+    return statement
+
+# ---------------- REQUEST HOOKS ---------------- #
+
+class RequestMetrics:
+    """Per-process request/SQL metrics; cheap enough to leave on.
+
+    Each query costs two ``perf_counter`` calls; each request one dict
+    update under a lock. Totals are per worker process.
+    """
+
+    def __init__(self, recent=500):
+        self.slow_ms = 500
+        self._recent = recent
+        self._endpoints = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def init_app(self, app):
+        self.slow_ms = float(app.config.setdefault(
+            'SLOW_REQUEST_MS', os.environ.get('SLOW_REQUEST_MS', 500)
+        ))
+        log_path = app.config.setdefault(
+            'SLOW_REQUEST_LOG', os.environ.get('SLOW_REQUEST_LOG')
+        )
+        if log_path and not slow_log.handlers:
+            handler = logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            slow_log.addHandler(handler)
+            slow_log.setLevel(logging.INFO)
+            slow_log.propagate = False
+
+        _listen()
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+
+    def add_listener(self, started, finished):
+        """Also report every request elsewhere (e.g. Prometheus).
+
+        ``started(method, route)`` runs when the request begins and
+        ``finished(method, route, status, elapsed)`` exactly once at the end.
+        """
+        self._listeners.append((started, finished))
+
+    def _start(self):
+        stats = g._request_stats = RequestStats()
+        for started, _ in self._listeners:
+            started(request.method, stats.route)
+
+    def _notify_finished(self, stats, status, elapsed):
+        for _, finished in self._listeners:
+            finished(request.method, stats.route, status, elapsed)
+
+    def _teardown(self, exc):
+        # Unhandled exceptions that propagate never reach after_request
+        stats = g.pop("_request_stats", None)
+        if stats is not None:
+            self._notify_finished(stats, 500, time.perf_counter() - stats.start)
+
+    def _finish(self, response):
+        stats = g.pop("_request_stats", None)
+        if stats is None:
+            return response
+
+        elapsed = time.perf_counter() - stats.start
+        self._notify_finished(stats, response.status_code, elapsed)
+        elapsed_ms = elapsed * 1000
+        db_ms = stats.db_time * 1000
+
+        response.headers["X-Query-Count"] = str(stats.queries)
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_ms:.2f};desc="{stats.queries} queries", '
+            f'app;dur={elapsed_ms:.2f}'
+        )
+
+        slow = elapsed_ms >= self.slow_ms
+        if slow:
+            self._log_slow(stats, elapsed_ms, db_ms, response.status_code)
+
+        key = f"{request.method} {stats.route}"
+        with self._lock:
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                endpoint = self._endpoints[key] = EndpointStats(self._recent)
+            endpoint.add(stats, elapsed, response.status_code, slow)
+
+        return response
+
+    def _log_slow(self, stats, elapsed_ms, db_ms, status):
+        slow_log.warning(json.dumps({
+            "event": "slow_request",
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": status,
+            "duration_ms": round(elapsed_ms, 2),
+            "db_ms": round(db_ms, 2),
+            "queries": stats.queries,
+            "slowest_query_ms": round(stats.slowest_time * 1000, 2),
+            "slowest_query": _short_sql(stats.slowest_sql),
+            "user_id": current_user.get_id()
+        }))
+
+    def snapshot(self):
+        """Per-endpoint totals, most total time first."""
+        with self._lock:
+            rows = [endpoint.as_dict(key) for key, endpoint in self._endpoints.items()]
+        for row in rows:
+            row["slowest_query"] = _short_sql(row["slowest_query"])
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self.started_at = time.time()
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,155 @@
+from collections import defaultdict, namedtuple
+from datetime import date
+from sqlalchemy import func
+from extensions import db
+from models import (Order, OrderItem, Food, DailySales,
+                    DailyRestaurantSales, DailyFoodSales)
+from db_helpers import upsert_increment
+
+# Incremental daily rollups behind /admin/dashboard. Placed orders add to
+# them, cancellations subtract, and rebuild_rollups() recomputes them from
+# order history. Cancelled orders are not counted.
+
+SaleLine = namedtuple("SaleLine", "food_id restaurant_id food_name price quantity")
+
+
+def load_sale_lines(order_id):
+    rows = (
+        db.session.query(
+            OrderItem.food_id,
+            Food.restaurant_id,
+            OrderItem.food_name,
+            OrderItem.price,
+            OrderItem.quantity
+        )
+        .outerjoin(Food, Food.id == OrderItem.food_id)
+        .filter(OrderItem.order_id == order_id)
+        .all()
+    )
+    return [SaleLine(*row) for row in rows]
+
+
+def record_order_sales(order, lines, sign=1):
+    """Add (``sign=1``) or remove (``sign=-1``) an order from the rollups.
+
+    Runs in the caller's transaction. Lines whose dish no longer exists only
+    count towards the all-restaurant totals.
+    """
+    day = order.created_at.date()
+
+    upsert_increment(
+        DailySales,
+        {"day": day},
+        {"order_count": sign, "revenue": sign * order.total}
+    )
+
+    revenue_by_restaurant = defaultdict(float)
+    for line in lines:
+        if line.restaurant_id is None:
+            continue
+        revenue_by_restaurant[line.restaurant_id] += line.price * line.quantity
+        upsert_increment(
+            DailyFoodSales,
+            {"day": day, "food_id": line.food_id},
+            {"quantity": sign * line.quantity},
+            defaults={
+                "restaurant_id": line.restaurant_id,
+                "food_name": line.food_name
+            }
+        )
+
+    for restaurant_id, revenue in revenue_by_restaurant.items():
+        upsert_increment(
+            DailyRestaurantSales,
+            {"day": day, "restaurant_id": restaurant_id},
+            {"order_count": sign, "revenue": sign * revenue}
+        )
+
+
+def record_status_change(order, old_status, new_status):
+    # Only moves into or out of "Cancelled" change the rollups
+    if old_status != 'Cancelled' and new_status == 'Cancelled':
+        record_order_sales(order, load_sale_lines(order.id), sign=-1)
+    elif old_status == 'Cancelled' and new_status != 'Cancelled':
+        record_order_sales(order, load_sale_lines(order.id), sign=1)
+
+
+def _as_date(value):
+    # func.date() gives a string on SQLite and a date on PostgreSQL
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from order history; returns days covered."""
+    day = func.date(Order.created_at)
+    counted = Order.status != 'Cancelled'
+
+    daily = (
+        db.session.query(day, func.count(Order.id), func.sum(Order.total))
+        .filter(counted)
+        .group_by(day)
+        .all()
+    )
+
+    per_restaurant = (
+        db.session.query(
+            day,
+            Food.restaurant_id,
+            func.count(func.distinct(Order.id)),
+            func.sum(OrderItem.price * OrderItem.quantity)
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .join(Food, Food.id == OrderItem.food_id)
+        .filter(counted, Food.restaurant_id.isnot(None))
+        .group_by(day, Food.restaurant_id)
+        .all()
+    )
+
+    per_food = (
+        db.session.query(
+            day,
+            OrderItem.food_id,
+            Food.restaurant_id,
+            func.max(OrderItem.food_name),
+            func.sum(OrderItem.quantity)
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .join(Food, Food.id == OrderItem.food_id)
+        .filter(counted, Food.restaurant_id.isnot(None))
+        .group_by(day, OrderItem.food_id, Food.restaurant_id)
+        .all()
+    )
+
+    DailySales.query.delete()
+    DailyRestaurantSales.query.delete()
+    DailyFoodSales.query.delete()
+
+    if daily:
+        db.session.execute(DailySales.__table__.insert(), [
+            {"day": _as_date(d), "order_count": count, "revenue": revenue or 0}
+            for d, count, revenue in daily
+        ])
+    if per_restaurant:
+        db.session.execute(DailyRestaurantSales.__table__.insert(), [
+            {
+                "day": _as_date(d),
+                "restaurant_id": restaurant_id,
+                "order_count": count,
+                "revenue": revenue or 0
+            }
+            for d, restaurant_id, count, revenue in per_restaurant
+        ])
+    if per_food:
+        db.session.execute(DailyFoodSales.__table__.insert(), [
+            {
+                "day": _as_date(d),
+                "food_id": food_id,
+                "restaurant_id": restaurant_id,
+                "food_name": food_name,
+                "quantity": quantity
+            }
+            for d, food_id, restaurant_id, food_name, quantity in per_food
+        ])
+
+    db.session.commit()
+    return len(daily)
@@ -0,0 +1,153 @@
+import re
+from sqlalchemy import Float, Integer, bindparam, text
+from extensions import db
+
+# FTS5 index over dish name, cuisine and restaurant name. rowid == food.id.
+# Databases without the table (or non-SQLite backends) fall back to ILIKE.
+
+CREATE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS food_search USING fts5(
+    name, cuisine, restaurant,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# bm25 column weights: name matches outrank cuisine, cuisine outranks restaurant
+RANK_SQL = "bm25(food_search, 10.0, 5.0, 2.0)"
+
+_ready = set()
+
+
+def is_available():
+    engine = db.session.get_bind()
+    if engine.url in _ready:
+        return True
+    if engine.dialect.name != "sqlite":
+        return False
+
+    found = db.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'food_search'"
+    )).first()
+    if found:
+        _ready.add(engine.url)
+    return bool(found)
+
+
+def match_expression(search):
+    """Turn free text into an FTS5 query: every word must prefix-match."""
+    words = re.findall(r"\w+", search)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_hits(search):
+    """Subquery of (food_id, score) for ``search``; lower score ranks higher.
+
+    Returns None when the index is unavailable so callers can fall back.
+    """
+    expression = match_expression(search)
+    if not expression or not is_available():
+        return None
+
+    return (
+        text(
+            f"SELECT rowid AS food_id, {RANK_SQL} AS score "
+            "FROM food_search WHERE food_search MATCH :expression"
+        )
+        .bindparams(expression=expression)
+        .columns(food_id=Integer, score=Float)
+        .subquery("search_hits")
+    )
+
+
+def index_food(food):
+    if not is_available():
+        return
+
+    restaurant = food.restaurant.name if food.restaurant else ""
+    db.session.execute(
+        text("DELETE FROM food_search WHERE rowid = :id"), {"id": food.id}
+    )
+    db.session.execute(
+        text(
+            "INSERT INTO food_search (rowid, name, cuisine, restaurant) "
+            "VALUES (:id, :name, :cuisine, :restaurant)"
+        ),
+        {
+            "id": food.id,
+            "name": food.name or "",
+            "cuisine": food.cuisine or "",
+            "restaurant": restaurant
+        }
+    )
+
+
+def unindex_food(food_id):
+    if not is_available():
+        return
+
+    db.session.execute(
+        text("DELETE FROM food_search WHERE rowid = :id"), {"id": food_id}
+    )
+
+
+def index_foods(food_ids):
+    """Re-index many dishes with one DELETE and one INSERT ... SELECT."""
+    if not food_ids or not is_available():
+        return
+
+    ids = {"ids": list(food_ids)}
+    db.session.execute(
+        text("DELETE FROM food_search WHERE rowid IN :ids")
+        .bindparams(bindparam("ids", expanding=True)),
+        ids
+    )
+    db.session.execute(
+        text("""
+            INSERT INTO food_search (rowid, name, cuisine, restaurant)
+            SELECT food.id,
+                   coalesce(food.name, ''),
+                   coalesce(food.cuisine, ''),
+                   coalesce(restaurant.name, '')
+            FROM food
+            LEFT JOIN restaurant ON restaurant.id = food.restaurant_id
+            WHERE food.id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)),
+        ids
+    )
+
+
+def unindex_foods(food_ids):
+    if not food_ids or not is_available():
+        return
+
+    db.session.execute(
+        text("DELETE FROM food_search WHERE rowid IN :ids")
+        .bindparams(bindparam("ids", expanding=True)),
+        {"ids": list(food_ids)}
+    )
+
+
+def rebuild_search_index():
+    """Rebuild food_search; returns the dish count, or None off SQLite."""
+    # FTS5 is SQLite-only; other backends keep the ILIKE search
+    if db.session.get_bind().dialect.name != "sqlite":
+        return None
+
+    db.session.execute(text(CREATE_SQL))
+    db.session.execute(text("DELETE FROM food_search"))
+    db.session.execute(text("""
+        INSERT INTO food_search (rowid, name, cuisine, restaurant)
+        SELECT food.id,
+               coalesce(food.name, ''),
+               coalesce(food.cuisine, ''),
+               coalesce(restaurant.name, '')
+        FROM food
+        LEFT JOIN restaurant ON restaurant.id = food.restaurant_id
+    """))
+    db.session.execute(text(
+        "INSERT INTO food_search (food_search) VALUES ('optimize')"
+    ))
+    db.session.commit()
+
+    return db.session.execute(text("SELECT count(*) FROM food_search")).scalar()
@@ -0,0 +1,6 @@
+document.addEventListener("DOMContentLoaded", function() {
+  const cartBadge = document.getElementById("cart-count");
+  if (cartBadge && cartBadge.textContent.trim() === "0") {
+    cartBadge.style.display = "none";
+  }
+});
@@ -0,0 +1,70 @@
+// Clicks are collected for a short moment and sent as one batch request
+const pendingAdds = {};
+const pendingButtons = {};
+let flushTimer = null;
+
+function showAddFailed(buttons) {
+    buttons.forEach(btn => {
+        clearTimeout(btn.resetTimer);
+        btn.innerText = "NOT ADDED ✗";
+        btn.resetTimer = setTimeout(() => {
+            btn.innerText = "ADD";
+        }, 2000);
+    });
+}
+
+function flushCart() {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    const buttons = [];
+    const changes = Object.entries(pendingAdds).map(([foodId, delta]) => {
+        delete pendingAdds[foodId];
+        buttons.push(...pendingButtons[foodId]);
+        delete pendingButtons[foodId];
+        return { food_id: Number(foodId), delta: delta };
+    });
+    if (changes.length === 0) return;
+
+    // keepalive: the request survives the page being left (pagehide flush)
+    fetch("/api/cart/batch", {
+        method: "POST",
+        keepalive: true,
+        headers: {
+            "Content-Type": "application/json",
+            "X-Requested-With": "XMLHttpRequest"
+        },
+        body: JSON.stringify({ changes: changes })
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (!data.success) {
+            showAddFailed(buttons);
+            return;
+        }
+
+        // 🔥 UPDATE CART BADGE from the server's summary
+        const badge = document.getElementById("cart-count");
+
+        badge.innerText = data.cart.count;
+        badge.style.display = data.cart.count > 0 ? "inline-block" : "none";
+    })
+    .catch(() => showAddFailed(buttons));
+}
+
+function addToCart(foodId, btn) {
+    pendingAdds[foodId] = (pendingAdds[foodId] || 0) + 1;
+    pendingButtons[foodId] = pendingButtons[foodId] || new Set();
+    pendingButtons[foodId].add(btn);
+    if (!flushTimer) {
+        flushTimer = setTimeout(flushCart, 300);
+    }
+
+    // Button feedback
+    btn.innerText = "ADDED ✓";
+    clearTimeout(btn.resetTimer);
+    btn.resetTimer = setTimeout(() => {
+        btn.innerText = "ADD";
+    }, 1200);
+}
+
+window.addEventListener("pagehide", flushCart);
@@ -0,0 +1,51 @@
+const FINAL_STATUSES = ["Delivered", "Cancelled"];
+
+function applyStatus(orderId, status) {
+  document.querySelectorAll(`.live-status[data-order-id="${orderId}"]`)
+    .forEach(span => { span.innerText = status; });
+}
+
+function activeOrderIds() {
+  return Array.from(document.querySelectorAll(".live-status"))
+    .filter(span => !FINAL_STATUSES.includes(span.innerText.trim()))
+    .map(span => span.dataset.orderId);
+}
+
+// Fallback: one request for every order on the page
+function pollOrderStatuses() {
+  const ids = activeOrderIds();
+  if (ids.length === 0) return;
+
+  fetch(`/api/order-status?ids=${ids.join(",")}`)
+    .then(res => res.json())
+    .then(data => {
+      if (!data.success) return;
+      Object.entries(data.statuses).forEach(([id, status]) => applyStatus(id, status));
+    });
+}
+
+let pollTimer = null;
+function startPolling() {
+  if (pollTimer) return;
+  pollOrderStatuses();
+  pollTimer = setInterval(pollOrderStatuses, 5000);
+}
+
+// Only keep a connection open while some order can still change
+const watchedIds = activeOrderIds();
+if (watchedIds.length > 0) {
+  if (window.EventSource) {
+    // Reconnects reuse this URL, so final statuses reached meanwhile still arrive
+    const source = new EventSource(`/api/order-status/stream?ids=${watchedIds.join(",")}`);
+    source.addEventListener("status", e => {
+      const data = JSON.parse(e.data);
+      applyStatus(data.order_id, data.status);
+      if (activeOrderIds().length === 0) source.close();
+    });
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) startPolling();
+    };
+  } else {
+    startPolling();
+  }
+}
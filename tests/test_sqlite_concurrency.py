@@ -0,0 +1,87 @@
+"""Readers must not stall behind a writer's open transaction (WAL, db_config).
+
+The writer takes the strongest lock SQLite has (BEGIN EXCLUSIVE) and keeps
+its transaction open while a second connection reads. In WAL mode the read
+returns at once with the last committed value; with the old rollback
+journal the same read waits out busy_timeout and fails.
+"""
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from db_config import apply_sqlite_pragmas, sqlite_pragmas
+
+BUSY_TIMEOUT_MS = 300
+
+
+def make_engine(path, journal_mode):
+    engine = create_engine("sqlite:///" + str(path))
+    pragmas = sqlite_pragmas({})
+    pragmas["journal_mode"] = journal_mode
+    pragmas["busy_timeout"] = BUSY_TIMEOUT_MS
+    apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def connect(engine):
+    raw = engine.raw_connection()
+    raw.driver_connection.isolation_level = None  # explicit BEGIN/COMMIT
+    return raw
+
+
+@pytest.fixture
+def database(tmp_path):
+    def open_pair(journal_mode):
+        engine = make_engine(tmp_path / "cart.db", journal_mode)
+        writer, reader = connect(engine), connect(engine)
+        writer.cursor().execute("CREATE TABLE cart (id INTEGER PRIMARY KEY, quantity INTEGER)")
+        writer.cursor().execute("INSERT INTO cart (id, quantity) VALUES (1, 1)")
+        # Load the schema on the reader while nothing holds a lock
+        assert timed_read(reader)[0] == 1
+        return engine, writer, reader
+    return open_pair
+
+
+def hold_write_lock(writer):
+    cursor = writer.cursor()
+    cursor.execute("BEGIN EXCLUSIVE")
+    cursor.execute("UPDATE cart SET quantity = quantity + 1 WHERE id = 1")
+
+
+def timed_read(reader):
+    start = time.perf_counter()
+    quantity = reader.cursor().execute("SELECT quantity FROM cart WHERE id = 1").fetchone()[0]
+    return quantity, time.perf_counter() - start
+
+
+def test_default_pragmas_use_wal():
+    assert sqlite_pragmas({})["journal_mode"] == "WAL"
+
+
+def test_wal_reader_does_not_wait_for_writer(database):
+    engine, writer, reader = database("WAL")
+    hold_write_lock(writer)
+
+    quantity, elapsed = timed_read(reader)
+
+    assert quantity == 1  # last committed state, not the pending write
+    assert elapsed < BUSY_TIMEOUT_MS / 1000 / 2
+
+    writer.cursor().execute("COMMIT")
+    assert timed_read(reader)[0] == 2
+    engine.dispose()
+
+
+def test_rollback_journal_reader_stalls_behind_writer(database):
+    engine, writer, reader = database("DELETE")
+    hold_write_lock(writer)
+
+    start = time.perf_counter()
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        timed_read(reader)
+
+    assert time.perf_counter() - start >= BUSY_TIMEOUT_MS / 1000 * 0.9
+    writer.cursor().execute("ROLLBACK")
+    engine.dispose()
@@ -1,7 +0,0 @@
-from app import app
-from extensions import db
-
-with app.app_context():
-    db.create_all()
-
-print("✅ OrderStatusHistory table created")